@@ -0,0 +1,126 @@
+# Regression check for cursor pagination of finance records on the SQLite
+# backend: random records across a few tenders (tied sort values, missing
+# fields) are paged through for every sort field, order, tender filter and a
+# range of page sizes, and the pages joined must equal the records sorted by
+# (sort value, id) with those missing the field left out. A record written
+# between two pages must not repeat or skip any other, and a cursor must be
+# refused for a different sort. Exits non-zero on the first mismatch.
+#
+#   python benchmarks/check_pagination.py --records 300
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage import FINANCE_SORT_FIELDS, InvalidCursor, SQLiteStorage
+
+TENDERS = ('T-1', 'T-2', 'T-3')
+
+
+def random_record(rng, n):
+    record = {"Name": f"vendor{rng.randint(0, 40):02d}"}
+    for field in ('Budget', 'NPV', 'IRR'):
+        if rng.random() > 0.1:
+            record[field] = rng.randint(0, 25)
+    if rng.random() > 0.3:
+        record["Vagueness"] = round(rng.random(), 2)
+    return f"doc{n:05d}", record
+
+
+def expected_ids(records, tender, sort, descending):
+    rows = [(record[sort], doc_id) for doc_id, (record_tender, record) in records.items()
+            if (tender is None or record_tender == tender) and record.get(sort) is not None]
+    return [doc_id for _, doc_id in sorted(rows, reverse=descending)]
+
+
+def page_through(storage, tender, sort, descending, limit, on_page=None):
+    ids, cursor = [], None
+    while True:
+        items, cursor = storage.read_finance_page(tender, sort, descending, limit, cursor)
+        if len(items) > limit:
+            raise AssertionError(f"page of {len(items)} records with limit {limit}")
+        ids.extend(doc_id for doc_id, _ in items)
+        if cursor is None:
+            return ids
+        if not items:
+            raise AssertionError("empty page with a next cursor")
+        if on_page is not None:
+            on_page()
+
+
+def run(storage, rng, records):
+    for sort in FINANCE_SORT_FIELDS:
+        for descending in (False, True):
+            for tender in (None, *TENDERS):
+                expected = expected_ids(records, tender, sort, descending)
+                for limit in (1, 2, 7, 50, len(records) + 1):
+                    ids = page_through(storage, tender, sort, descending, limit)
+                    if ids != expected:
+                        return (f"sort={sort} descending={descending} tender={tender} "
+                                f"limit={limit}: got {len(ids)} records, expected {len(expected)}")
+
+                # A write between pages must not disturb the records around it
+                written = []
+
+                def write_one():
+                    if len(written) == 3:
+                        return
+                    doc_id, record = random_record(rng, len(records))
+                    record_tender = tender or rng.choice(TENDERS)
+                    storage.write_finance(doc_id, record, tender=record_tender)
+                    records[doc_id] = (record_tender, record)
+                    written.append(doc_id)
+
+                ids = page_through(storage, tender, sort, descending, 5, on_page=write_one)
+                if len(ids) != len(set(ids)):
+                    return f"sort={sort} descending={descending} tender={tender}: repeated records"
+                missing = set(expected) - set(ids)
+                if missing:
+                    return (f"sort={sort} descending={descending} tender={tender}: "
+                            f"skipped {sorted(missing)[:5]} while records were written")
+
+        _, cursor = storage.read_finance_page(None, sort, False, 1)
+        other = FINANCE_SORT_FIELDS[(FINANCE_SORT_FIELDS.index(sort) + 1) % len(FINANCE_SORT_FIELDS)]
+        for wrong_sort, wrong_order in ((sort, True), (other, False)):
+            try:
+                storage.read_finance_page(None, wrong_sort, wrong_order, 1, cursor)
+            except InvalidCursor:
+                continue
+            return f"a {sort} cursor was accepted for sort={wrong_sort} descending={wrong_order}"
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check finance cursor pagination on SQLite.')
+    parser.add_argument('--records', type=int, default=300)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    workdir = tempfile.mkdtemp(prefix='tendoreasy-pagination-')
+    try:
+        storage = SQLiteStorage(os.path.join(workdir, 'finance.db'))
+        records = {}
+        for n in range(args.records):
+            doc_id, record = random_record(rng, n)
+            tender = rng.choice(TENDERS)
+            storage.write_finance(doc_id, record, tender=tender)
+            records[doc_id] = (tender, record)
+        try:
+            failure = run(storage, rng, records)
+        except AssertionError as e:
+            failure = str(e)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    if failure:
+        sys.exit(f"Pagination mismatch (seed {args.seed}), {failure}")
+    print(json.dumps({"check": "pagination", "records": args.records, "ok": True}))
+
+
+if __name__ == '__main__':
+    main()
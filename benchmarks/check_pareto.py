@@ -0,0 +1,70 @@
+# Regression check for recommendation.pareto_front and pareto_fronts: random
+# matrices (small integer ranges, so duplicate and tied rows are common) with
+# random cost columns are compared with a brute-force pairwise dominance
+# test. Exits non-zero on the first mismatch.
+#
+#   python benchmarks/check_pareto.py --rounds 500
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from recommendation import pareto_front, pareto_fronts
+
+
+# True where row a dominates row b: at least as good everywhere, better once
+def dominates(a, b, cost):
+    a = np.where(cost, -a, a)
+    b = np.where(cost, -b, b)
+    return bool((a >= b).all() and (a > b).any())
+
+
+def brute_front(matrix, cost, rows):
+    return {i for i in rows if not any(dominates(matrix[j], matrix[i], cost) for j in rows)}
+
+
+def brute_fronts(matrix, cost, needed):
+    fronts = np.zeros(len(matrix), dtype=int)
+    remaining = set(range(len(matrix)))
+    front = 0
+    while remaining and (needed is None or front == 0 or (fronts > 0).sum() < needed):
+        front += 1
+        members = brute_front(matrix, cost, remaining)
+        fronts[list(members)] = front
+        remaining -= members
+    return fronts
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check Pareto fronts against brute force.')
+    parser.add_argument('--rounds', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    for round_number in range(args.rounds):
+        rows = int(rng.integers(0, 40))
+        columns = int(rng.integers(1, 6))
+        matrix = rng.integers(0, int(rng.integers(2, 10)), size=(rows, columns)).astype(float)
+        cost = rng.random(columns) < 0.4
+        needed = None if rng.random() < 0.5 else int(rng.integers(1, 10))
+
+        front = set(np.flatnonzero(pareto_front(matrix, cost)).tolist())
+        expected = brute_front(matrix, cost, range(rows))
+        if front != expected:
+            sys.exit(f"pareto_front mismatch in round {round_number}: got {sorted(front)}, "
+                     f"expected {sorted(expected)}\n{matrix}\ncost={cost}")
+        fronts = pareto_fronts(matrix, cost, needed)
+        expected_fronts = brute_fronts(matrix, cost, needed)
+        if not np.array_equal(fronts, expected_fronts):
+            sys.exit(f"pareto_fronts mismatch in round {round_number} (needed={needed}): "
+                     f"got {fronts.tolist()}, expected {expected_fronts.tolist()}")
+    print(json.dumps({"check": "pareto", "rounds": args.rounds, "ok": True}))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+# Regression check for the running finance statistics: random streams of
+# values (negative, zero and positive, spanning many magnitudes) are added to
+# and removed from a QuantileSketch and a FieldStats, and after every step the
+# quantiles, count, mean, min and max are compared with the exact values of
+# the remaining sample. Quantiles must be within RELATIVE_ACCURACY of the
+# sample value at the same rank. Exits non-zero on the first mismatch.
+#
+#   python benchmarks/check_quantiles.py --rounds 200 --steps 200
+import argparse
+import json
+import math
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from finance_stats import RELATIVE_ACCURACY, FieldStats, QuantileSketch
+
+CHECKED_QUANTILES = (0, 0.1, 0.5, 0.9, 0.99, 1)
+
+
+def random_value(rng):
+    kind = rng.random()
+    if kind < 0.05:
+        return 0
+    value = rng.choice([rng.randint(1, 50), 10 ** rng.uniform(-3, 9)])
+    return -value if kind < 0.2 else value
+
+
+def close(estimate, exact):
+    return abs(estimate - exact) <= RELATIVE_ACCURACY * abs(exact) + 1e-9
+
+
+def check(sketch, stats, sample):
+    ordered = sorted(sample)
+    if sketch.count != len(ordered) or stats.count != len(ordered):
+        return f"count {sketch.count}/{stats.count}, expected {len(ordered)}"
+    if not ordered:
+        if sketch.positive or sketch.negative or sketch.zeros:
+            return f"empty sketch keeps buckets {sketch.to_dict()}"
+        return None if stats.summary() == {"count": 0} else "empty stats keep values"
+    for q in CHECKED_QUANTILES:
+        exact = ordered[math.floor(q * (len(ordered) - 1))]
+        estimate = sketch.quantile(q)
+        if not close(estimate, exact):
+            return f"quantile {q} is {estimate}, expected about {exact}"
+    summary = stats.summary()
+    mean = sum(ordered) / len(ordered)
+    if abs(summary["mean"] - mean) > 1e-6 * max(1.0, abs(mean), max(map(abs, ordered))):
+        return f"mean is {summary['mean']}, expected {mean}"
+    if not close(summary["min"], ordered[0]) or not close(summary["max"], ordered[-1]):
+        return f"min/max are {summary['min']}/{summary['max']}, expected {ordered[0]}/{ordered[-1]}"
+    if QuantileSketch.from_dict(sketch.to_dict()).to_dict() != sketch.to_dict():
+        return "sketch does not round-trip through to_dict"
+    return None
+
+
+def run(rng, steps):
+    sketch = QuantileSketch()
+    stats = FieldStats()
+    sample = []
+    for step in range(steps):
+        # Removals pick a value already added, as a replaced record does
+        if sample and rng.random() < 0.4:
+            value = sample.pop(rng.randrange(len(sample)))
+            sketch.remove(value)
+            stats.remove(value)
+        else:
+            value = random_value(rng)
+            sample.append(value)
+            sketch.add(value)
+            stats.add(value)
+        failure = check(sketch, stats, sample)
+        if failure:
+            return f"step {step}: {failure}"
+    # Draining the sample must leave both empty
+    while sample:
+        value = sample.pop()
+        sketch.remove(value)
+        stats.remove(value)
+    failure = check(sketch, stats, sample)
+    return f"after removing every value: {failure}" if failure else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check finance quantile sketches against exact values.')
+    parser.add_argument('--rounds', type=int, default=200)
+    parser.add_argument('--steps', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    for round_number in range(args.rounds):
+        failure = run(random.Random(args.seed + round_number), args.steps)
+        if failure:
+            sys.exit(f"Finance statistics mismatch (seed {args.seed + round_number}), {failure}")
+    print(json.dumps({"check": "quantiles", "rounds": args.rounds, "steps_per_round": args.steps,
+                      "ok": True}))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+# Regression check for the incremental RankingIndex: applies random streams
+# of added, modified and removed records (values drawn from a small range so
+# bounds are hit, widened and narrowed often, and scores tie) and compares
+# the index after every change with a ranking scored from scratch by
+# scoring.score_frame. Exits non-zero on the first mismatch.
+#
+#   python benchmarks/check_ranking.py --rounds 50 --changes 60
+import argparse
+import json
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ranking_index import RankingIndex
+from scoring import DEFAULT_WEIGHTS, finance_frame, score_frame
+
+
+def random_record(rng, name):
+    record = {"Name": name}
+    for criterion in DEFAULT_WEIGHTS:
+        # Now and then a record misses a criterion and must drop out
+        if rng.random() > 0.05:
+            record[criterion] = rng.randint(0, 20)
+    return record
+
+
+# {name: score} of the records with every criterion, scored from scratch
+def expected_scores(records):
+    frame = finance_frame(records.values())
+    return dict(zip(frame['Name'], score_frame(frame).tolist()))
+
+
+def check(index, records):
+    expected = expected_scores(records)
+    ranked = index.top()
+    if len(ranked) != len(expected) or len(index) != len(expected):
+        return f"index holds {len(ranked)} records, expected {len(expected)}"
+    previous = float('inf')
+    for score, *values, name in ranked:
+        if name not in expected or abs(score - expected[name]) > 1e-9:
+            return f"{name} scored {score}, expected {expected.get(name)}"
+        if score > previous + 1e-12:
+            return f"{name} ranked below a lower score"
+        if values != [records[name][criterion] for criterion in DEFAULT_WEIGHTS]:
+            return f"{name} holds {values}, expected {records[name]}"
+        previous = score
+    return None
+
+
+def run(rng, changes):
+    index = RankingIndex()
+    records = {f"v{n}": random_record(rng, f"v{n}") for n in range(rng.randint(0, 8))}
+    index.follow(list(records.items()), None)
+    failure = check(index, records)
+    if failure:
+        return f"after reset: {failure}"
+    for step in range(changes):
+        name = f"v{rng.randint(0, 30)}"
+        if name in records and rng.random() < 0.3:
+            del records[name]
+            index.apply([('removed', name, None)])
+        else:
+            kind = 'modified' if name in records else 'added'
+            records[name] = random_record(rng, name)
+            index.apply([(kind, name, records[name])])
+        # Complete records only, as the finance frame keeps them
+        complete = {name: record for name, record in records.items()
+                    if all(criterion in record for criterion in DEFAULT_WEIGHTS)}
+        failure = check(index, complete)
+        if failure:
+            return f"change {step}: {failure}"
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check RankingIndex against full rescoring.')
+    parser.add_argument('--rounds', type=int, default=50)
+    parser.add_argument('--changes', type=int, default=60)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    for round_number in range(args.rounds):
+        failure = run(random.Random(args.seed + round_number), args.changes)
+        if failure:
+            sys.exit(f"RankingIndex mismatch (seed {args.seed + round_number}), {failure}")
+    print(json.dumps({"check": "ranking_index", "rounds": args.rounds,
+                      "changes_per_round": args.changes, "ok": True}))
+
+
+if __name__ == '__main__':
+    main()
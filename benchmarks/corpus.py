@@ -0,0 +1,152 @@
+# Reproducible synthetic RFP corpora for benchmarks. Faker fills each
+# vendor's submission with contract-style prose (sprinkled with the kind of
+# hedged wording vagueness.py flags) and the labelled finance fields that
+# extractor.py looks for; the same seed always yields the same PDFs and the
+# matching finance records.
+#
+#   python benchmarks/corpus.py --vendors 20 --pages 10 --fields last --out /tmp/corpus
+import argparse
+import json
+import os
+import random
+import re
+
+from faker import Faker
+
+from pdf_writer import write_pdf
+
+# Where the fields sit in each PDF: all on the first, middle or last page, or
+# one field per page spread across the document
+FIELD_POSITIONS = ('first', 'middle', 'last', 'spread')
+
+HEDGES = ['as applicable', 'to be decided', 'subject to approval', 'where necessary',
+          'within a reasonable time', 'as per requirement', 'if required']
+LINES_PER_PAGE = 40
+LINE_CHARS = 90
+
+
+class SyntheticRFP:
+    def __init__(self, tender, filename, pdf, info):
+        self.tender = tender
+        self.filename = filename
+        self.pdf = pdf
+        self.info = info
+
+
+# Finance fields of one vendor, as extract_info() reports them
+def vendor_info(fake, rng, name):
+    return {
+        "Name": name,
+        "Budget": str(rng.randint(50, 5000)),
+        "NPV": str(rng.randint(10, 2000)),
+        "IRR": str(rng.randint(4, 35)),
+        "Phone no": str(rng.randint(10 ** 9, 10 ** 10 - 1)),
+        "Email": f"bids@{re.sub(r'[^a-z0-9]', '', name.lower())}.example",
+        "Time taken": str(rng.randint(30, 720)),
+        "Number of Previous works": str(rng.randint(0, 60))
+    }
+
+
+# Vendor names match the extractor's single-word Name pattern
+def vendor_name(fake, index):
+    return re.sub(r'\W', '', fake.company()) + str(index)
+
+
+def _prose(fake, rng, lines):
+    text = []
+    while len(text) < lines:
+        sentence = fake.sentence(nb_words=rng.randint(8, 16))
+        if rng.random() < 0.15:
+            sentence = sentence[:-1] + ' ' + rng.choice(HEDGES) + '.'
+        text.extend(_wrap(sentence))
+    return text[:lines]
+
+
+def _wrap(sentence):
+    lines, line = [], ''
+    for word in sentence.split():
+        if line and len(line) + len(word) + 1 > LINE_CHARS:
+            lines.append(line)
+            line = word
+        else:
+            line = f'{line} {word}'.strip()
+    return lines + [line]
+
+
+def _field_lines(info):
+    return [f"{field}: {value}" for field, value in info.items()]
+
+
+# PDF bytes for one vendor's submission
+def rfp_pdf(fake, rng, info, pages, fields='last'):
+    field_lines = _field_lines(info)
+    body = [_prose(fake, rng, LINES_PER_PAGE) for _ in range(pages)]
+    if fields == 'spread':
+        for index, line in enumerate(field_lines):
+            body[index * pages // len(field_lines)].insert(rng.randint(0, 5), line)
+    else:
+        page = {'first': 0, 'middle': pages // 2, 'last': pages - 1}[fields]
+        body[page][3:3] = field_lines
+    return write_pdf([(lines, None) for lines in body])
+
+
+# One submission per vendor for each tender
+def generate_corpus(vendors=10, pages=5, fields='last', tenders=1, seed=0):
+    if fields not in FIELD_POSITIONS:
+        raise ValueError(f"fields must be one of {', '.join(FIELD_POSITIONS)}")
+    fake = Faker()
+    fake.seed_instance(seed)
+    rng = random.Random(seed)
+    corpus = []
+    for tender_index in range(1, tenders + 1):
+        tender = f"T-{tender_index:03d}"
+        for vendor_index in range(1, vendors + 1):
+            info = vendor_info(fake, rng, vendor_name(fake, vendor_index))
+            corpus.append(SyntheticRFP(tender, f"{tender}-{info['Name']}.pdf",
+                                       rfp_pdf(fake, rng, info, pages, fields), info))
+    return corpus
+
+
+# Finance records matching a corpus, shaped like main.record_finance() writes
+# them; doc ids follow the same "<tender>:<Name>" scheme
+def finance_records(corpus):
+    records = []
+    for rfp in corpus:
+        info = rfp.info
+        records.append((f"{rfp.tender}:{info['Name']}", rfp.tender, {
+            "Name": info["Name"],
+            "Budget": int(info["Budget"]),
+            "NPV": int(info["NPV"]),
+            "IRR": int(info["IRR"]),
+            "Phone No": info["Phone no"],
+            "Email": info["Email"],
+            "Time taken": int(info["Time taken"]),
+            "Number of Previous works": int(info["Number of Previous works"])
+        }))
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Write a synthetic RFP corpus to a directory.')
+    parser.add_argument('--vendors', type=int, default=10)
+    parser.add_argument('--pages', type=int, default=5)
+    parser.add_argument('--fields', choices=FIELD_POSITIONS, default='last')
+    parser.add_argument('--tenders', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', required=True)
+    args = parser.parse_args()
+
+    corpus = generate_corpus(args.vendors, args.pages, args.fields, args.tenders, args.seed)
+    for rfp in corpus:
+        directory = os.path.join(args.out, rfp.tender)
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, rfp.filename), 'wb') as f:
+            f.write(rfp.pdf)
+    with open(os.path.join(args.out, 'finance.json'), 'w') as f:
+        json.dump([{"id": doc_id, "tender": tender, **record}
+                   for doc_id, tender, record in finance_records(corpus)], f, indent=2)
+    print(f"Wrote {len(corpus)} RFPs to {args.out}")
+
+
+if __name__ == '__main__':
+    main()
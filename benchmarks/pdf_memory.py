@@ -0,0 +1,90 @@
+# Peak-memory benchmark for the upload path's PDF handling: runs
+# extract_document() over synthetic scanned-style RFPs (a page-sized image
+# plus ~6 KB of clause text per page, with the vendor fields on the last page
+# so every page is read), then indexes the spooled page text as
+# store_extraction() does, and compares the tracemalloc peak of a short and a
+# long document. Pages are read and spooled one at a time, so the peak should
+# only grow with the document's cross-reference table, not with page contents
+# (~96 KB per page here); the script exits non-zero if it grows by more than
+# --max-bytes-per-page.
+#
+#   python benchmarks/pdf_memory.py --pages 200
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pdf_writer import write_pdf
+
+FIELDS_PAGE = [
+    'Name:BenchmarkVendor', 'Budget:125000', 'NPV:40000', 'IRR:12',
+    'Time taken:90', 'Email: bids@vendor.example', 'Phone no:5550100',
+    'Number of Previous works:7'
+]
+
+
+CLAUSE = ('The contractor shall complete the scope of work and comply with the terms '
+          'of the tender.')
+
+
+def scanned_rfp(pages, image_side=300, lines=10, clauses_per_line=7):
+    image = (image_side, image_side, os.urandom(image_side * image_side))
+    body = [([f'Section {n}', *[' '.join(f'{n}.{line}.{c} {CLAUSE}' for c in range(clauses_per_line))
+                                for line in range(lines)]], image)
+            for n in range(1, pages)]
+    return write_pdf(body + [(FIELDS_PAGE, image)])
+
+
+def measure(pages, workdir):
+    # Import the parser before tracing so the peak reflects extraction only
+    import pdf_text  # noqa: F401
+    from main import extract_document, spooled_pages
+    from text_index import TextIndex
+
+    data = scanned_rfp(pages)
+    pdf_path = os.path.join(workdir, f'{pages}.pdf')
+    with open(pdf_path, 'wb') as f:
+        f.write(data)
+    index = TextIndex(os.path.join(workdir, f'{pages}.db'))
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = extract_document(pdf_path, spool_dir=workdir)
+    index.add(str(pages), spooled_pages(result["pages_path"]))
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    if result["missing"]:
+        raise RuntimeError(f"Fields not extracted: {', '.join(result['missing'])}")
+    return {"pages": pages, "file_bytes": len(data), "seconds": elapsed, "peak_bytes": peak}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure peak memory of PDF text extraction.')
+    parser.add_argument('--pages', type=int, default=200)
+    parser.add_argument('--baseline-pages', type=int, default=20)
+    parser.add_argument('--max-bytes-per-page', type=float, default=4096,
+                        help='fail if the peak grows by more than this per additional page')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='tendoreasy-pdf-memory-')
+    try:
+        baseline = measure(args.baseline_pages, workdir)
+        long_run = measure(args.pages, workdir)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    per_page = (long_run['peak_bytes'] - baseline['peak_bytes']) / (args.pages - args.baseline_pages)
+    print(json.dumps({"benchmark": "pdf_memory", "baseline": baseline, "long": long_run,
+                      "peak_bytes_per_extra_page": per_page}, indent=2))
+    if per_page > args.max_bytes_per_page:
+        sys.exit(f"Peak memory grew {per_page:.0f} bytes per page from {args.baseline_pages} "
+                 f"to {args.pages} pages")
+
+
+if __name__ == '__main__':
+    main()
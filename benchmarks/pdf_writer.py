@@ -0,0 +1,50 @@
+# Minimal PDF writer for benchmark inputs: one Helvetica font, text lines
+# per page and an optional grayscale image XObject standing in for a scan.
+
+
+def _escape(line):
+    return line.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def _stream(dictionary, data):
+    return b'<< %s /Length %d >>\nstream\n' % (dictionary, len(data)) + data + b'\nendstream'
+
+
+# pages: list of (lines, image) where image is None or (width, height, bytes)
+def write_pdf(pages):
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        None,  # page tree, filled in once page numbers are known
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>'
+    ]
+    kids = []
+    for lines, image in pages:
+        ops = ['BT', '/F1 11 Tf', '72 740 Td', '13 TL']
+        ops.extend(f'({_escape(line)}) Tj T*' for line in lines)
+        ops.append('ET')
+        xobjects = b''
+        if image is not None:
+            width, height, data = image
+            objects.append(_stream(b'/Type /XObject /Subtype /Image /Width %d /Height %d '
+                                   b'/ColorSpace /DeviceGray /BitsPerComponent 8' % (width, height), data))
+            xobjects = b' /XObject << /Im1 %d 0 R >>' % len(objects)
+            ops.insert(0, 'q 612 0 0 792 0 0 cm /Im1 Do Q')
+        objects.append(_stream(b'', '\n'.join(ops).encode('latin-1')))
+        contents = len(objects)
+        objects.append(b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] '
+                       b'/Resources << /Font << /F1 3 0 R >>%s >> /Contents %d 0 R >>'
+                       % (xobjects, contents))
+        kids.append(b'%d 0 R' % len(objects))
+    objects[1] = b'<< /Type /Pages /Kids [%s] /Count %d >>' % (b' '.join(kids), len(kids))
+
+    out = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b'%d 0 obj\n' % number + body + b'\nendobj\n'
+    xref = len(out)
+    out += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    for offset in offsets:
+        out += b'%010d 00000 n \n' % offset
+    out += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+    return bytes(out)
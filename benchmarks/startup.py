@@ -0,0 +1,60 @@
+# Cold-start benchmark: times `import main; main.create_app()` in fresh
+# interpreters and reports which heavy dependencies were loaded on the way.
+#
+#   python benchmarks/startup.py --runs 10 --max-seconds 0.5
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ['pandas', 'numpy', 'scipy', 'matplotlib', 'pdfreader', 'faker', 'firebase_admin']
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import main
+main.create_app()
+elapsed = time.perf_counter() - start
+heavy = sorted({name.split('.')[0] for name in sys.modules} & set(%r))
+print(json.dumps({"seconds": elapsed, "heavy_modules": heavy}))
+""" % (HEAVY_MODULES,)
+
+
+def measure(runs):
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, '-c', PROBE], cwd=ROOT, check=True,
+                                capture_output=True, text=True).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+    seconds = [sample['seconds'] for sample in samples]
+    return {
+        "benchmark": "startup",
+        "runs": runs,
+        "min_seconds": min(seconds),
+        "median_seconds": statistics.median(seconds),
+        "max_seconds": max(seconds),
+        "heavy_modules": sorted({name for sample in samples for name in sample['heavy_modules']})
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure cold start of the app factory.')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--max-seconds', type=float,
+                        help='fail if the median cold start exceeds this many seconds')
+    args = parser.parse_args()
+
+    result = measure(args.runs)
+    print(json.dumps(result, indent=2))
+    if args.max_seconds is not None and result['median_seconds'] > args.max_seconds:
+        sys.exit(f"Median cold start {result['median_seconds']:.3f}s exceeds {args.max_seconds}s")
+    if result['heavy_modules']:
+        sys.exit(f"Heavy modules imported at startup: {', '.join(result['heavy_modules'])}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+# End-to-end benchmark suite over a synthetic corpus (see corpus.py): times
+# extract_info(), screen_ideas(), the finance table and budget chart renders
+# and full HTTP routes through the Flask test client, with the SQLite backend
+# standing in for Firestore. Prints one JSON document with throughput and
+# p50/p95/p99 latency per benchmark, so runs can be diffed between commits;
+# --baseline adds the latency ratios against an earlier run's output.
+#
+#   python benchmarks/suite.py --vendors 20 --pages 10 --output before.json
+#   python benchmarks/suite.py --vendors 20 --pages 10 --baseline before.json
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from io import BytesIO
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from corpus import FIELD_POSITIONS, finance_records, generate_corpus
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))]
+
+
+# Call fn(i) for i in range(iterations) after `warmup` untimed calls
+def measure(fn, iterations, warmup=1):
+    for i in range(warmup):
+        fn(i)
+    samples = []
+    started = time.perf_counter()
+    for i in range(iterations):
+        call_started = time.perf_counter()
+        fn(i)
+        samples.append(time.perf_counter() - call_started)
+    total = time.perf_counter() - started
+    return {
+        "iterations": iterations,
+        "throughput_per_second": iterations / total if total else None,
+        "mean_seconds": sum(samples) / len(samples),
+        "p50_seconds": percentile(samples, 50),
+        "p95_seconds": percentile(samples, 95),
+        "p99_seconds": percentile(samples, 99)
+    }
+
+
+def _ok(response):
+    if response.status_code != 200:
+        raise RuntimeError(f"{response.request.path} answered {response.status_code}")
+    response.get_data()
+    return response
+
+
+def run(args, directory):
+    from charts import render_bar_chart
+    from main import (create_app, create_html_table, extract_info, finance_page_args,
+                      screen_ideas, services)
+
+    corpus = generate_corpus(args.vendors, args.pages, args.fields, args.tenders, args.seed)
+    tender = corpus[0].tender
+    records = [record for _, record_tender, record in finance_records(corpus)
+               if record_tender == tender]
+    app = create_app({
+        'STORAGE_BACKEND': 'sqlite',
+        'SQLITE_PATH': os.path.join(directory, 'bench.db'),
+        'EXTRACT_CACHE_DIR': os.path.join(directory, 'extract_cache'),
+        'JOBS_DIR': os.path.join(directory, 'jobs'),
+        'TEXT_INDEX_PATH': os.path.join(directory, 'text_index.db'),
+        'JOB_WORKERS': 0
+    })
+    client = app.test_client()
+    iterations = args.iterations
+    results = {}
+
+    results["extract_info"] = measure(
+        lambda i: extract_info(BytesIO(corpus[i % len(corpus)].pdf)), iterations)
+
+    # Each upload is new, so every request extracts; the records it stores
+    # are the data the routes below read
+    def upload(i):
+        rfp = corpus[i]
+        _ok(client.post('/extract_info', data={'pdfFile': (BytesIO(rfp.pdf), rfp.filename),
+                                               'tender': rfp.tender}))
+
+    results["POST /extract_info"] = measure(lambda i: upload(i + 1), len(corpus) - 1,
+                                            warmup=0)
+    upload(0)
+
+    with app.app_context():
+        results["screen_ideas"] = measure(lambda i: screen_ideas(records, top_ranks=3), iterations)
+        results["screen_ideas (stored)"] = measure(
+            lambda i: screen_ideas(None, tender=tender, top_ranks=3), iterations)
+        results["chart_render"] = measure(lambda i: render_bar_chart(
+            [record["Name"] for record in records], [record["Budget"] for record in records],
+            'Budget Values by Name', 'Names', 'Budget (in lakhs)'), iterations)
+    with app.test_request_context(f'/fakedata?tender={tender}'):
+        services().storage.read_finance_page(tender)
+        results["table_render"] = measure(
+            lambda i: ''.join(create_html_table(finance_page_args())), iterations)
+
+    routes = {
+        "GET /rank": f'/rank?tender={tender}',
+        "GET /rank (zscore)": f'/rank?tender={tender}&method=zscore',
+        "GET /recommend": f'/recommend?tender={tender}',
+        "GET /recommend (weighted)": f'/recommend?tender={tender}&method=weighted&weight.IRR=0.5',
+        "GET /fakedata": f'/fakedata?tender={tender}',
+        "GET /finance": f'/finance?tender={tender}&sort=Budget&order=desc',
+        "GET /budgetbar": f'/budgetbar?tender={tender}',
+        "GET /charts/budget.png": f'/charts/budget.png?tender={tender}',
+        "GET /search": f'/search?q=tender&tender={tender}'
+    }
+    for name, url in routes.items():
+        results[name] = measure(lambda i, url=url: _ok(client.get(url)), iterations)
+    return results
+
+
+def _commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# Latency ratios (current / baseline) for benchmarks present in both runs
+def compare(results, baseline):
+    comparison = {}
+    for name, current in results.items():
+        previous = baseline.get("results", {}).get(name)
+        if previous:
+            comparison[name] = {
+                key.replace('_seconds', '_ratio'): current[key] / previous[key]
+                for key in ("p50_seconds", "p95_seconds", "p99_seconds") if previous[key]
+            }
+    return comparison
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the end-to-end benchmark suite.')
+    parser.add_argument('--vendors', type=int, default=20)
+    parser.add_argument('--pages', type=int, default=5)
+    parser.add_argument('--fields', choices=FIELD_POSITIONS, default='last')
+    parser.add_argument('--tenders', type=int, default=2)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--iterations', type=int, default=30)
+    parser.add_argument('--output', help='also write the JSON report to this file')
+    parser.add_argument('--baseline', help='JSON report of an earlier run to compare against')
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix='tendoreasy-bench-')
+    try:
+        results = run(args, directory)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "commit": _commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            "params": vars(args)
+        },
+        "results": results
+    }
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["comparison"] = compare(results, json.load(f))
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from io import BytesIO
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+CHART_FORMATS = {'png': 'image/png', 'svg': 'image/svg+xml'}
+
+
+# Stable hash of the values a chart is drawn from
+def chart_key(*parts):
+    payload = json.dumps(parts, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha1(payload).hexdigest()[:16]
+
+
+# Draw a bar chart on its own Figure with the Agg canvas. Nothing touches
+# pyplot's global figure registry, so figures are freed once rendered and
+# concurrent requests do not share state.
+def render_bar_chart(labels, values, title, xlabel, ylabel, fmt='png'):
+    fig = Figure(figsize=(12, 6))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    positions = range(len(labels))
+    ax.bar(positions, values)
+    ax.set_title(title)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    ax.set_xticks(list(positions))
+    ax.set_xticklabels(labels, rotation=45, ha='right')
+    fig.tight_layout()
+
+    buffer = BytesIO()
+    fig.savefig(buffer, format=fmt, metadata={'Date': None} if fmt == 'svg' else None)
+    return buffer.getvalue()
+
+
+class ChartCache:
+    # Rendered chart bytes keyed by (chart key, format), least recently used
+    # entries evicted first
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_render(self, key, fmt, render):
+        with self._lock:
+            body = self._entries.get((key, fmt))
+            if body is not None:
+                self._entries.move_to_end((key, fmt))
+                self.hits += 1
+                return body
+            self.misses += 1
+
+        body = render()
+        with self._lock:
+            self._entries[(key, fmt)] = body
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return body
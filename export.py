@@ -0,0 +1,140 @@
+import csv
+import io
+import math
+from tempfile import SpooledTemporaryFile
+
+# Columns of the comparison report, with their Parquet types
+COLUMNS = [
+    ('tender', 'string'),
+    ('rank', 'int64'),
+    ('score', 'float64'),
+    ('Name', 'string'),
+    ('Budget', 'int64'),
+    ('NPV', 'int64'),
+    ('IRR', 'int64'),
+    ('Time taken', 'int64'),
+    ('Number of Previous works', 'int64'),
+    ('Vagueness', 'float64'),
+    ('Phone No', 'string'),
+    ('Email', 'string')
+]
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'parquet': 'application/vnd.apache.parquet'
+}
+# Finished files are sent in chunks of this size
+CHUNK_BYTES = 64 * 1024
+# XLSX sheets are assembled in memory up to this size, then on disk
+SPOOL_BYTES = 8 * 1024 * 1024
+
+
+# Write report rows in `fmt`, consuming `batches` (lists of row dicts keyed
+# by column name) one at a time; yields the file's bytes as they are ready
+def export_rows(fmt, batches):
+    if fmt == 'csv':
+        return _csv(batches)
+    if fmt == 'xlsx':
+        return _xlsx(batches)
+    if fmt == 'parquet':
+        return _parquet(batches)
+    raise ValueError(f"Unsupported export format: {fmt}")
+
+
+def _csv(batches):
+    names = [name for name, _ in COLUMNS]
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=names, extrasaction='ignore')
+    writer.writeheader()
+    for batch in batches:
+        writer.writerows(batch)
+        yield out.getvalue().encode('utf-8')
+        out.seek(0)
+        out.truncate()
+    yield out.getvalue().encode('utf-8')
+
+
+# openpyxl's write-only mode streams each row to a temporary sheet file;
+# the zip container can only be assembled once every row is in
+def _xlsx(batches):
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Comparison')
+    names = [name for name, _ in COLUMNS]
+    sheet.append(names)
+    for batch in batches:
+        for row in batch:
+            sheet.append([_cell(row.get(name)) for name in names])
+    with SpooledTemporaryFile(max_size=SPOOL_BYTES) as file:
+        workbook.save(file)
+        file.seek(0)
+        while chunk := file.read(CHUNK_BYTES):
+            yield chunk
+
+
+def _cell(value):
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+class _ChunkSink:
+    # Write-only file object collecting what the Parquet writer emits, so
+    # each row group can be sent as soon as it is written
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+# One Parquet row group per batch
+def _parquet(batches):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([(name, getattr(pa, kind)()) for name, kind in COLUMNS])
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(pa.PythonFile(sink, mode='w'), schema)
+    try:
+        for batch in batches:
+            columns = {name: [_typed(row.get(name), kind) for row in batch] for name, kind in COLUMNS}
+            writer.write_table(pa.Table.from_pydict(columns, schema=schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+# Values that do not fit a column's type are left empty
+def _typed(value, kind):
+    if value is None:
+        return None
+    try:
+        if kind == 'int64':
+            return int(value)
+        if kind == 'float64':
+            value = float(value)
+            return None if math.isnan(value) else value
+    except (TypeError, ValueError, OverflowError):
+        return None
+    return str(value)
@@ -0,0 +1,118 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+
+from extractor import EXTRACTOR_VERSION
+
+
+# Key a PDF by the hash of its bytes, reading the stream in chunks and
+# rewinding it afterwards; returns the key and the size in bytes
+def pdf_key(stream, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    size = 0
+    stream.seek(0)
+    for chunk in iter(lambda: stream.read(chunk_size), b""):
+        digest.update(chunk)
+        size += len(chunk)
+    stream.seek(0)
+    return digest.hexdigest(), size
+
+
+class ExtractionCache:
+    # On-disk, content-addressed store of extract_info results. Entries live
+    # under a directory named after the extractor version, so changing the
+    # field patterns starts a fresh cache. Eviction is least recently used,
+    # bounded both by entry count and total bytes on disk.
+    def __init__(self, root, max_entries=1000, max_bytes=64 * 1024 * 1024,
+                 version=EXTRACTOR_VERSION):
+        self.root = root
+        self.version = version
+        self.directory = os.path.join(root, f"v{version}")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> size in bytes, oldest first
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._drop_stale_versions(os.path.basename(self.directory))
+        self._load_index()
+
+    def _drop_stale_versions(self, current):
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if name != current and name.startswith("v") and os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+
+    # Rebuild the LRU order from file access times left by a previous run
+    def _load_index(self):
+        found = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            stat = os.stat(os.path.join(self.directory, name))
+            found.append((stat.st_mtime, name[:-5], stat.st_size))
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self._total_bytes += size
+        self._evict()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            try:
+                with open(self._path(key)) as f:
+                    result = json.load(f)
+                os.utime(self._path(key))
+            except (OSError, ValueError):
+                self._total_bytes -= self._entries.pop(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def put(self, key, result):
+        payload = json.dumps(result).encode("utf-8")
+        with self._lock:
+            tmp_path = self._path(key) + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(payload)
+            os.replace(tmp_path, self._path(key))
+
+            self._total_bytes -= self._entries.pop(key, 0)
+            self._entries[key] = len(payload)
+            self._total_bytes += len(payload)
+            self._evict()
+
+    def _evict(self):
+        while self._entries and (len(self._entries) > self.max_entries
+                                 or self._total_bytes > self.max_bytes):
+            key, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "version": self.version
+            }
@@ -0,0 +1,54 @@
+import re
+
+# Bump whenever FIELD_PATTERNS, the page text fed to them or the shape of
+# extraction results change so cached results are invalidated
+EXTRACTOR_VERSION = 5
+
+# Field name -> (label pattern, value pattern)
+FIELD_PATTERNS = {
+    "Name": (r'Name:\s*', r'\w+'),
+    "NPV": (r'NPV:\s*', r'\d+'),
+    "IRR": (r'IRR:\s*', r'\d+'),
+    "Phone no": (r'Phone no:\s*', r'\d+'),
+    "Time taken": (r'Time taken:\s*', r'\d+'),
+    "Budget": (r'Budget:\s*', r'\d+'),
+    "Email": (r'Email:\s*', r'[\w\.-]+@[\w\.-]+'),
+    "Number of Previous works": (r'Number of Previous works:\s*', r'\d+')
+}
+
+
+class FieldExtractor:
+    # All patterns are combined into a single lookahead alternation so each
+    # page is scanned once. The lookahead keeps matches overlap-safe: a greedy
+    # value such as "Name:AcmeNPV" does not hide the "NPV:" that follows it.
+    def __init__(self, patterns=FIELD_PATTERNS):
+        self.fields = list(patterns)
+        self._groups = {}
+        alternatives = []
+        for index, (field, (label, value)) in enumerate(patterns.items()):
+            group = f"f{index}"
+            self._groups[group] = field
+            alternatives.append(f'{label}(?P<{group}>{value})')
+        self.pattern = re.compile('(?=' + '|'.join(alternatives) + ')')
+
+    def new_info(self):
+        return {field: "" for field in self.fields}
+
+    # Fill fields not yet set in info from text; returns True once all are set
+    def scan(self, text, info):
+        remaining = {field for field in self.fields if not info[field]}
+        for match in self.pattern.finditer(text):
+            group = match.lastgroup
+            field = self._groups[group]
+            if field in remaining:
+                info[field] = match.group(group)
+                remaining.discard(field)
+                if not remaining:
+                    break
+        return not remaining
+
+    def missing(self, info):
+        return [field for field in self.fields if not info[field]]
+
+
+field_extractor = FieldExtractor()
@@ -0,0 +1,205 @@
+import itertools
+import threading
+import time
+
+# Versions are unique across caches, so an artifact keyed on one can never be
+# mistaken for another cache's (or a replaced cache's) data
+_versions = itertools.count(1)
+
+
+class FinanceCache:
+    # In-process, read-through copy of one tender's finance records (every
+    # record when tender is None), optionally limited to `fields`. A storage
+    # watcher (a Firestore on_snapshot listener) keeps it current, and the
+    # data is reloaded at once if the watcher reports a missed change; when
+    # no watcher can be attached the data is reloaded once it is older than
+    # ttl seconds. `version` increases on every refresh so callers can key
+    # derived artifacts (rendered pages, charts) on it.
+    #
+    # A cache limited to `fields` can be given the tender's full-record cache
+    # as `source`; it then shares that cache's watcher and projects each
+    # delivery on the client instead of attaching a listener of its own.
+    def __init__(self, storage, ttl=60, listen=True, listen_timeout=5, tender=None, fields=None,
+                 source=None):
+        self.storage = storage
+        self.ttl = ttl
+        self.listen = listen
+        self.listen_timeout = listen_timeout
+        self.tender = tender
+        self.fields = list(fields) if fields else None
+        self.source = source
+        self.version = 0
+        self.reads = 0
+        # Lookups served from memory, and those that had to reload
+        self.hits = 0
+        self.misses = 0
+        self._items = None
+        self._data = None
+        self._table = None
+        self._loaded_at = 0.0
+        self._watch = None
+        self._subscribers = []
+        self._ready = threading.Event()
+        self._lock = threading.Lock()
+        self._listen_lock = threading.Lock()
+        self._source_version = None
+        if source is not None:
+            self.listen = False
+            source.subscribe(self._on_source)
+
+    # Current finance documents; the returned list must be treated as read-only
+    def get(self):
+        self._refresh()
+        return self._data
+
+    # (version, documents) read together, for keying derived artifacts
+    def snapshot(self):
+        self._refresh()
+        with self._lock:
+            return self.version, self._data
+
+    # Current (doc_id, record) pairs; also read-only
+    def items(self):
+        self._refresh()
+        return self._items
+
+    # Typed columnar view of the current records (a FinanceTable), built once
+    # per version
+    def table(self):
+        from finance_records import FinanceTable
+
+        self._refresh()
+        with self._lock:
+            if self._table is None or self._table[0] != self.version:
+                self._table = (self.version, FinanceTable.from_items(self._items, self.fields))
+            return self._table[1]
+
+    # Register fn(items, changes) to follow every refresh. `changes` lists the
+    # ('added' | 'modified' | 'removed', doc_id, record) entries delivered by
+    # the watcher, or is None after a full reload.
+    def subscribe(self, fn):
+        self._subscribers.append(fn)
+
+    def unsubscribe(self, fn):
+        if fn in self._subscribers:
+            self._subscribers.remove(fn)
+
+    def invalidate(self):
+        with self._lock:
+            self._data = None
+
+    def _refresh(self):
+        if self.source is not None and self._refresh_from_source():
+            return
+        if self.listen and self._watch is None:
+            # Watchers may deliver the first snapshot synchronously, so the
+            # data lock must not be held while attaching one
+            with self._listen_lock:
+                if self._watch is None:
+                    self._start_listener()
+            # The first snapshot carries the whole collection; wait for it
+            # rather than streaming the collection a second time
+            if self.listen:
+                self._ready.wait(self.listen_timeout)
+
+        with self._lock:
+            if self._data is not None and self._current():
+                self.hits += 1
+                return
+            self.misses += 1
+            items = self.storage.read_finance_items(self.tender, self.fields)
+            self._set(items, reads=len(items))
+        self._notify(items, None)
+
+    # Follow the source while its watcher is live; once it has none (listening
+    # is off or failed) this cache reads its own fields under the TTL
+    def _refresh_from_source(self):
+        source = self.source
+        if not source.listen:
+            return False
+        source._refresh()
+        with source._lock:
+            version, items = source.version, source._items
+        if source._watch is None:
+            return False
+        with self._lock:
+            if self._data is not None and self._source_version == version:
+                self.hits += 1
+                return True
+            self.misses += 1
+            items = self._project_items(items)
+            self._set(items, reads=0)
+            self._source_version = version
+        self._notify(items, None)
+        return True
+
+    # A watcher keeps the data current unless it reports having missed
+    # changes; without one the data is current until ttl runs out
+    def _current(self):
+        if self._watch is None:
+            return not self._expired()
+        stale = getattr(self._watch, 'stale', None)
+        return stale is None or not stale()
+
+    def _expired(self):
+        return time.monotonic() - self._loaded_at > self.ttl
+
+    def _set(self, items, reads):
+        self._items = items
+        self._data = [record for _, record in items]
+        self._loaded_at = time.monotonic()
+        self.reads += reads
+        self.version = next(_versions)
+
+    def _notify(self, items, changes):
+        for fn in list(self._subscribers):
+            fn(items, changes)
+
+    def _start_listener(self):
+        try:
+            self._watch = self.storage.watch_finance(self._on_change, tender=self.tender)
+        except Exception as e:
+            print(f"Finance listener unavailable, using {self.ttl}s TTL: {e}")
+            self.listen = False
+
+    # Runs on the watcher thread with the tender's full record set; only the
+    # changed documents are billed as reads
+    def _on_change(self, items, changes):
+        if self.fields is not None:
+            items = self._project_items(items)
+            changes = [(kind, doc_id, self._project(record)) for kind, doc_id, record in changes]
+        with self._lock:
+            first = self._data is None
+            self._set(items, reads=len(changes))
+        self._notify(items, None if first else changes)
+        self._ready.set()
+
+    # Runs after every refresh of the source; its documents were billed there
+    def _on_source(self, items, changes):
+        items = self._project_items(items)
+        if changes is not None:
+            changes = [(kind, doc_id, self._project(record)) for kind, doc_id, record in changes]
+        with self._lock:
+            first = self._data is None
+            self._set(items, reads=0)
+            self._source_version = self.source.version
+        self._notify(items, None if first else changes)
+
+    def _project_items(self, items):
+        return [(doc_id, self._project(record)) for doc_id, record in items]
+
+    # Watchers deliver whole records; keep only the cached fields
+    def _project(self, record):
+        if record is None:
+            return None
+        return {field: record[field] for field in self.fields if field in record}
+
+    # Stop listening; later reads reload the data once it is older than ttl
+    def close(self):
+        if self.source is not None:
+            self.source.unsubscribe(self._on_source)
+        with self._listen_lock:
+            self.listen = False
+            if self._watch is not None:
+                self._watch.unsubscribe()
+                self._watch = None
@@ -0,0 +1,183 @@
+import re
+
+# Numeric finance fields with the NumPy dtype of their column
+NUMERIC_FIELDS = {
+    'Budget': 'i8',
+    'NPV': 'i8',
+    'IRR': 'i8',
+    'Time taken': 'i8',
+    'Number of Previous works': 'i8',
+    'Vagueness': 'f8'
+}
+# A record is only stored with these
+REQUIRED_FIELDS = ('Name', 'Budget', 'NPV', 'IRR')
+# Names become document ids, so they are kept to what the extractor matches
+NAME_PATTERN = re.compile(r'\w+')
+# Integer fields must fit their int64 column
+INT_LIMIT = 2 ** 63
+
+
+class InvalidFinanceRecord(ValueError):
+    def __init__(self, errors):
+        super().__init__('; '.join(f"{field}: {error}" for field, error in errors.items()))
+        self.errors = errors
+
+
+class FinanceRecord:
+    # One vendor's finance fields, parsed and validated once when the RFP is
+    # ingested; numbers are ints (Vagueness a float) and missing optional
+    # fields are None. to_dict() is the stored form.
+    __slots__ = ('name', 'budget', 'npv', 'irr', 'phone', 'email', 'time_taken',
+                 'previous_works', 'vagueness')
+
+    def __init__(self, name, budget, npv, irr, phone=None, email=None, time_taken=None,
+                 previous_works=None, vagueness=None):
+        self.name = name
+        self.budget = budget
+        self.npv = npv
+        self.irr = irr
+        self.phone = phone
+        self.email = email
+        self.time_taken = time_taken
+        self.previous_works = previous_works
+        self.vagueness = vagueness
+
+    # Build from extract_info() output, where every field is a string and
+    # "" marks a missing one. Raises InvalidFinanceRecord listing every
+    # missing required field and every value that does not parse.
+    @classmethod
+    def from_info(cls, info, vagueness=None):
+        errors = {}
+        name = info.get("Name") or None
+        if name is None:
+            errors["Name"] = "missing"
+        elif not NAME_PATTERN.fullmatch(name):
+            errors["Name"] = f"invalid name {name!r}"
+        numbers = {field: _parse(info.get(field), NUMERIC_FIELDS[field], field, errors)
+                   for field in ('Budget', 'NPV', 'IRR', 'Time taken', 'Number of Previous works')}
+        for field in REQUIRED_FIELDS[1:]:
+            if numbers[field] is None and field not in errors:
+                errors[field] = "missing"
+        vagueness = _parse(vagueness, 'f8', 'Vagueness', errors)
+        if errors:
+            raise InvalidFinanceRecord(errors)
+        return cls(name, numbers["Budget"], numbers["NPV"], numbers["IRR"],
+                   phone=info.get("Phone no") or None, email=info.get("Email") or None,
+                   time_taken=numbers["Time taken"],
+                   previous_works=numbers["Number of Previous works"], vagueness=vagueness)
+
+    def to_dict(self):
+        record = {
+            "Name": self.name,
+            "Budget": self.budget,
+            "NPV": self.npv,
+            "IRR": self.irr,
+            "Phone No": self.phone,
+            "Email": self.email,
+            "Time taken": self.time_taken,
+            "Number of Previous works": self.previous_works
+        }
+        if self.vagueness is not None:
+            record["Vagueness"] = self.vagueness
+        return record
+
+
+# Parse a number for a column of `kind` ('i8' or 'f8'); None and "" are
+# missing, anything else that is not a finite, non-negative number is
+# reported in `errors`
+def _parse(value, kind, field, errors):
+    if value is None or value == "":
+        return None
+    try:
+        number = float(value) if kind == 'f8' else int(value)
+    except (TypeError, ValueError):
+        errors[field] = f"not a number: {value!r}"
+        return None
+    if not 0 <= number < (float('inf') if kind == 'f8' else INT_LIMIT):
+        errors[field] = f"out of range: {value!r}"
+        return None
+    return number
+
+
+class FinanceTable:
+    # Typed, columnar view of stored finance records: doc ids and names as
+    # object arrays, the numeric fields as one NumPy structured array with a
+    # matching boolean structured array marking missing values. Records are
+    # coerced once when the table is built (FinanceCache keeps one per
+    # version), so hot paths read contiguous typed columns.
+    def __init__(self, ids, names, values, missing):
+        self.ids = ids
+        self.names = names
+        self.values = values
+        self.missing = missing
+
+    # Table of (doc_id, record) pairs; only `fields` are parsed if given, the
+    # other columns are left missing. Fields outside NUMERIC_FIELDS, e.g.
+    # custom scoring criteria, get a float column of their own.
+    @classmethod
+    def from_items(cls, items, fields=None):
+        import numpy as np
+
+        fields = [field for field in fields or NUMERIC_FIELDS if field != 'Name']
+        kinds = dict(NUMERIC_FIELDS)
+        kinds.update((field, 'f8') for field in fields if field not in NUMERIC_FIELDS)
+        values = np.zeros(len(items), dtype=list(kinds.items()))
+        missing = np.ones(len(items), dtype=[(field, '?') for field in kinds])
+        for field in fields:
+            kind = kinds[field]
+            raw = [record.get(field) for _, record in items]
+            if all(type(value) is int for value in raw):
+                values[field] = raw
+                missing[field] = False
+                continue
+            parsed = [_coerce(value, kind) for value in raw]
+            present = np.array([value is not None for value in parsed], dtype=bool)
+            if present.any():
+                values[field][present] = [value for value in parsed if value is not None]
+            missing[field] = ~present
+        ids = np.array([doc_id for doc_id, _ in items], dtype=object)
+        names = np.array([record.get("Name") for _, record in items], dtype=object)
+        return cls(ids, names, values, missing)
+
+    def __len__(self):
+        return len(self.ids)
+
+    # (values, missing mask) of one numeric field; a field the table was not
+    # built with is entirely missing
+    def column(self, field):
+        if field not in self.values.dtype.names:
+            import numpy as np
+            return np.zeros(len(self)), np.ones(len(self), dtype=bool)
+        return self.values[field], self.missing[field]
+
+    # DataFrame of Name and `criteria` in their column dtypes; rows without a
+    # name are dropped, as are rows missing any criterion when `complete`.
+    # Otherwise missing values are NaN (and their column float).
+    def frame(self, criteria, complete=True):
+        import numpy as np
+        import pandas as pd
+
+        criteria = list(criteria)
+        keep = np.array([name is not None for name in self.names], dtype=bool)
+        if complete:
+            for criterion in criteria:
+                keep &= ~self.column(criterion)[1]
+        columns = {'Name': self.names[keep]}
+        for criterion in criteria:
+            values, missing = (column[keep] for column in self.column(criterion))
+            columns[criterion] = np.where(missing, np.nan, values) if missing.any() else values
+        return pd.DataFrame(columns, columns=['Name', *criteria])
+
+
+# Stored values are already typed unless written before validation at
+# ingest; those are coerced here, and unusable ones count as missing
+def _coerce(value, kind):
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        number = value if isinstance(value, int) else float(value)
+    except (TypeError, ValueError):
+        return None
+    if kind == 'f8':
+        return number if abs(number) < float('inf') else None
+    return int(number) if -INT_LIMIT <= number < INT_LIMIT else None
@@ -0,0 +1,195 @@
+import math
+
+# Finance fields summarized per tender
+STAT_FIELDS = ('Budget', 'NPV', 'IRR', 'Time taken')
+QUANTILES = {'median': 0.5, 'p90': 0.9}
+
+# Quantile estimates are within this relative error of a true sample value
+RELATIVE_ACCURACY = 0.01
+_GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+_LOG_GAMMA = math.log(_GAMMA)
+# Magnitudes below this count as zero
+_MIN_MAGNITUDE = 1e-9
+
+
+class QuantileSketch:
+    # Log-bucketed quantile sketch (as in DDSketch): a value x > 0 falls in
+    # bucket ceil(log_gamma(x)), so each bucket spans a fixed relative width
+    # and any quantile is answered within RELATIVE_ACCURACY from bucket
+    # counts alone. Unlike most sketches, values can be removed again, which
+    # a replaced finance record needs. Buckets stay few: values from 1 to
+    # 10^9 fit in about a thousand.
+    def __init__(self, positive=None, negative=None, zeros=0):
+        self.positive = positive or {}
+        self.negative = negative or {}
+        self.zeros = zeros
+
+    def add(self, value, count=1):
+        if abs(value) < _MIN_MAGNITUDE:
+            self.zeros += count
+            return
+        bins = self.positive if value > 0 else self.negative
+        index = _bucket_index(value)
+        bins[index] = bins.get(index, 0) + count
+        if bins[index] <= 0:
+            del bins[index]
+
+    def remove(self, value):
+        self.add(value, count=-1)
+
+    # Whether the bucket `value` falls in still counts any value
+    def holds(self, value):
+        if abs(value) < _MIN_MAGNITUDE:
+            return self.zeros > 0
+        bins = self.positive if value > 0 else self.negative
+        return bins.get(_bucket_index(value), 0) > 0
+
+    @property
+    def count(self):
+        return self.zeros + sum(self.positive.values()) + sum(self.negative.values())
+
+    # Value at quantile q (0 to 1), or None when empty
+    def quantile(self, q):
+        total = self.count
+        if total == 0:
+            return None
+        rank = q * (total - 1)
+        seen = 0
+        for index in sorted(self.negative, reverse=True):
+            seen += self.negative[index]
+            if seen > rank:
+                return -_bucket_value(index)
+        seen += self.zeros
+        if seen > rank:
+            return 0.0
+        for index in sorted(self.positive):
+            seen += self.positive[index]
+            if seen > rank:
+                return _bucket_value(index)
+        return _bucket_value(max(self.positive)) if self.positive else 0.0
+
+    # Firestore map keys must be strings
+    def to_dict(self):
+        return {"positive": {str(index): count for index, count in self.positive.items()},
+                "negative": {str(index): count for index, count in self.negative.items()},
+                "zeros": self.zeros}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls({int(index): count for index, count in data["positive"].items()},
+                   {int(index): count for index, count in data["negative"].items()},
+                   data["zeros"])
+
+
+def _bucket_index(value):
+    return math.ceil(math.log(abs(value)) / _LOG_GAMMA)
+
+
+def _bucket_value(index):
+    return 2 * _GAMMA ** index / (_GAMMA + 1)
+
+
+class FieldStats:
+    # Running count, sum, sum of squares, min, max and a quantile sketch of
+    # one field. min and max are exact until the record holding one of them
+    # is replaced; they then fall back to the sketch's estimate, which is
+    # re-estimated once its bucket empties.
+    def __init__(self, count=0, total=0.0, squares=0.0, minimum=None, maximum=None, sketch=None):
+        self.count = count
+        self.total = total
+        self.squares = squares
+        self.minimum = minimum
+        self.maximum = maximum
+        self.sketch = sketch or QuantileSketch()
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        self.squares += value * value
+        self.minimum = value if self.minimum is None else min(self.minimum, value)
+        self.maximum = value if self.maximum is None else max(self.maximum, value)
+        self.sketch.add(value)
+
+    def remove(self, value):
+        self.count -= 1
+        self.total -= value
+        self.squares -= value * value
+        self.sketch.remove(value)
+        if self.count <= 0:
+            self.__init__()
+            return
+        if value == self.minimum or not self.sketch.holds(self.minimum):
+            self.minimum = self.sketch.quantile(0)
+        if value == self.maximum or not self.sketch.holds(self.maximum):
+            self.maximum = self.sketch.quantile(1)
+
+    def summary(self):
+        if self.count == 0:
+            return {"count": 0}
+        mean = self.total / self.count
+        summary = {
+            "count": self.count,
+            "mean": mean,
+            "std": math.sqrt(max(0.0, self.squares / self.count - mean * mean)),
+            "min": self.minimum,
+            "max": self.maximum
+        }
+        for name, q in QUANTILES.items():
+            summary[name] = min(max(self.sketch.quantile(q), self.minimum), self.maximum)
+        return summary
+
+    def to_dict(self):
+        return {"count": self.count, "total": self.total, "squares": self.squares,
+                "min": self.minimum, "max": self.maximum, "sketch": self.sketch.to_dict()}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["count"], data["total"], data["squares"], data["min"], data["max"],
+                   QuantileSketch.from_dict(data["sketch"]))
+
+
+class FinanceStats:
+    # Aggregates of a tender's finance records, updated one write at a time
+    # and stored next to them, so reading a tender's statistics costs one
+    # document however many bids it has
+    def __init__(self, records=0, fields=None):
+        self.records = records
+        self.fields = fields or {field: FieldStats() for field in STAT_FIELDS}
+
+    # Account for a record written over `old` (None for a new record)
+    def update(self, old, new):
+        if old is None:
+            self.records += 1
+        for field, stats in self.fields.items():
+            old_value = _value(old, field)
+            new_value = _value(new, field)
+            if old_value is not None:
+                stats.remove(old_value)
+            if new_value is not None:
+                stats.add(new_value)
+
+    def summary(self):
+        return {"records": self.records,
+                "fields": {field: stats.summary() for field, stats in self.fields.items()}}
+
+    def to_dict(self):
+        return {"records": self.records,
+                "fields": {field: stats.to_dict() for field, stats in self.fields.items()}}
+
+    @classmethod
+    def from_dict(cls, data):
+        if not data:
+            return cls()
+        fields = {field: FieldStats() for field in STAT_FIELDS}
+        fields.update((field, FieldStats.from_dict(stats)) for field, stats in data["fields"].items())
+        return cls(data["records"], fields)
+
+
+def _value(record, field):
+    if record is None:
+        return None
+    try:
+        value = float(record.get(field))
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(value) else value
@@ -0,0 +1,226 @@
+import json
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+TERMINAL_STATES = ('done', 'failed', 'timeout')
+
+
+class QueueFull(RuntimeError):
+    pass
+
+
+def _connect(path):
+    conn = sqlite3.connect(path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+# Runs in a child process: extract one PDF, reporting page progress and the
+# extraction straight into the jobs database. A successful job is left
+# 'extracted'; the worker marks it done once on_complete has run.
+def _run_job(db_path, job_id, pdf_path, extract):
+    conn = _connect(db_path)
+
+    def progress(pages_done, pages_total):
+        with conn:
+            conn.execute('UPDATE jobs SET pages_done = ?, pages_total = ?, updated = ? WHERE id = ?',
+                         (pages_done, pages_total, time.time(), job_id))
+
+    try:
+        result, status, error = json.dumps(extract(pdf_path, progress=progress)), 'extracted', None
+    except Exception as e:
+        result, status, error = None, 'failed', f"{type(e).__name__}: {e}"
+    with conn:
+        conn.execute('UPDATE jobs SET status = ?, result = ?, error = ?, updated = ? WHERE id = ?',
+                     (status, result, error, time.time(), job_id))
+    conn.close()
+
+
+class JobQueue:
+    # Extraction jobs persisted in SQLite, with uploads spooled to files next
+    # to it, so queued work survives restarts without an outside broker.
+    #
+    # `workers` threads each claim one queued job at a time and run it in a
+    # child process, which can be terminated when the job exceeds `timeout`
+    # seconds. Submissions are refused with QueueFull once `max_pending` jobs
+    # are waiting. Several app processes may share one queue; claims are
+    # atomic, and a running job whose process stopped updating it for longer
+    # than the timeout is handed to another worker.
+    #
+    # extract(pdf_path, progress) returns the job's JSON-serializable result.
+    # The job is then 'extracted' until on_complete(job) has run: it may
+    # return a replacement result to keep, e.g. with bulky fields removed,
+    # and the job becomes 'done', or 'failed' if it raises. A job left
+    # 'extracted' by a stopped process is resumed like an abandoned one.
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            status TEXT NOT NULL,
+            filename TEXT,
+            tender TEXT,
+            key TEXT,
+            pages_done INTEGER NOT NULL DEFAULT 0,
+            pages_total INTEGER,
+            result TEXT,
+            error TEXT,
+            created REAL NOT NULL,
+            updated REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created);
+    """
+
+    def __init__(self, directory, extract, on_complete=None, workers=2, max_pending=100,
+                 timeout=300):
+        self.directory = directory
+        self.db_path = os.path.join(directory, 'jobs.db')
+        self.extract = extract
+        self.on_complete = on_complete
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._wakeup = threading.Condition()
+        self._threads = []
+        self._stopping = False
+
+        os.makedirs(directory, exist_ok=True)
+        with _connect(self.db_path) as conn:
+            conn.executescript(self.SCHEMA)
+
+    def start(self):
+        for _ in range(self.workers - len(self._threads)):
+            thread = threading.Thread(target=self._work, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        self._stopping = True
+        with self._wakeup:
+            self._wakeup.notify_all()
+
+    def _payload_path(self, job_id):
+        return os.path.join(self.directory, f'{job_id}.pdf')
+
+    # Queue a PDF stream for extraction; returns the job id
+    def submit(self, stream, key, filename=None, tender=None):
+        with _connect(self.db_path) as conn:
+            pending, = conn.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()
+        if pending >= self.max_pending:
+            raise QueueFull(f"{pending} extraction jobs are already queued.")
+
+        job_id = uuid.uuid4().hex
+        with open(self._payload_path(job_id), 'wb') as f:
+            stream.seek(0)
+            for chunk in iter(lambda: stream.read(1024 * 1024), b''):
+                f.write(chunk)
+
+        now = time.time()
+        with _connect(self.db_path) as conn:
+            conn.execute('INSERT INTO jobs (id, status, filename, tender, key, created, updated) '
+                         "VALUES (?, 'queued', ?, ?, ?, ?, ?)",
+                         (job_id, filename, tender, key, now, now))
+        with self._wakeup:
+            self._wakeup.notify()
+        return job_id
+
+    # Record a job that was answered without parsing, e.g. from a cache
+    def complete(self, result, key, filename=None, tender=None):
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with _connect(self.db_path) as conn:
+            conn.execute('INSERT INTO jobs (id, status, filename, tender, key, result, created, updated) '
+                         "VALUES (?, 'done', ?, ?, ?, ?, ?, ?)",
+                         (job_id, filename, tender, key, json.dumps(result), now, now))
+        return job_id
+
+    def get(self, job_id):
+        with _connect(self.db_path) as conn:
+            row = conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job['result'] = json.loads(job['result']) if job['result'] else None
+        return job
+
+    # Atomically claim the oldest queued (or abandoned running) job, moving
+    # it to running, or an abandoned extracted job, which stays extracted
+    # with a fresh timestamp. Returns (job_id, status) or None.
+    def _claim(self):
+        now = time.time()
+        abandoned = now - self.timeout - 30
+        with _connect(self.db_path) as conn:
+            row = conn.execute(
+                "SELECT id, status FROM jobs WHERE status = 'queued' "
+                "OR (status IN ('running', 'extracted') AND updated < ?) ORDER BY created LIMIT 1",
+                (abandoned,)).fetchone()
+            if row is None:
+                return None
+            if row['status'] == 'extracted':
+                claimed = conn.execute(
+                    "UPDATE jobs SET updated = ? WHERE id = ? AND status = 'extracted' "
+                    "AND updated < ?", (now, row['id'], abandoned)).rowcount
+                return (row['id'], 'extracted') if claimed else None
+            claimed = conn.execute(
+                "UPDATE jobs SET status = 'running', pages_done = 0, updated = ? "
+                "WHERE id = ? AND (status = 'queued' OR (status = 'running' AND updated < ?))",
+                (now, row['id'], abandoned)).rowcount
+        return (row['id'], 'running') if claimed else None
+
+    def _work(self):
+        while not self._stopping:
+            claimed = self._claim()
+            if claimed is None:
+                with self._wakeup:
+                    self._wakeup.wait(timeout=5)
+                continue
+            job_id, status = claimed
+            if status == 'extracted':
+                self._finish(job_id)
+            else:
+                self._run(job_id)
+
+    def _run(self, job_id):
+        process = multiprocessing.Process(
+            target=_run_job, args=(self.db_path, job_id, self._payload_path(job_id), self.extract))
+        process.start()
+        process.join(self.timeout)
+        if process.is_alive():
+            process.terminate()
+            process.join()
+            with _connect(self.db_path) as conn:
+                conn.execute("UPDATE jobs SET status = 'timeout', error = ?, updated = ? WHERE id = ?",
+                             (f"Extraction exceeded {self.timeout} seconds.", time.time(), job_id))
+        elif process.exitcode != 0:
+            with _connect(self.db_path) as conn:
+                conn.execute("UPDATE jobs SET status = 'failed', error = ?, updated = ? "
+                             "WHERE id = ? AND status = 'running'",
+                             (f"Worker exited with code {process.exitcode}.", time.time(), job_id))
+
+        try:
+            os.remove(self._payload_path(job_id))
+        except OSError:
+            pass
+
+        self._finish(job_id)
+
+    # Run on_complete for an extracted job and mark it done, or failed if
+    # on_complete raises
+    def _finish(self, job_id):
+        job = self.get(job_id)
+        if job['status'] != 'extracted':
+            return
+        result, status, error = job['result'], 'done', None
+        if self.on_complete is not None:
+            try:
+                result = self.on_complete(job) or result
+            except Exception as e:
+                print(f"Post-processing for job {job_id} failed: {e}")
+                status, error = 'failed', f"{type(e).__name__}: {e}"
+        with _connect(self.db_path) as conn:
+            conn.execute("UPDATE jobs SET status = ?, result = ?, error = ?, updated = ? "
+                         "WHERE id = ? AND status = 'extracted'",
+                         (status, json.dumps(result) if status == 'done' else None, error,
+                          time.time(), job_id))
@@ -1,748 +1,1150 @@
+from collections import OrderedDict
 from io import BytesIO
-import pandas as pd
-import numpy as np  # Added import
-import os  # Added import
-from collections import Counter
-from faker import Faker
-import random
-import webbrowser
-import matplotlib.pyplot as plt
-import base64
-from flask import Flask, render_template, request, jsonify
+from concurrent.futures import ProcessPoolExecutor
+from functools import cached_property, partial
+from tempfile import SpooledTemporaryFile, mkstemp
+import os
 import re
-from pdfreader import SimplePDFViewer, PDFDocument
-import firebase_admin  # Added import
-from firebase_admin import credentials, firestore  # Added import
-
-app = Flask(__name__)
-
-# Initialize Firebase Admin SDK
-cred = credentials.Certificate("rfpos-a18d7-firebase-adminsdk-wod3i-0456ff7ce6.json")
-firebase_admin.initialize_app(cred)
-db = firestore.client()
-
-TEMPLATES_DIR = 'templates'
-
-# Retrieve data from Firebase
-def retrieve_from_firebase():
-    finance_ref = db.collection('finance')
-    finance_data = [doc.to_dict() for doc in finance_ref.stream()]
-    return finance_data
-
-# Function to create HTML table from data
-def create_html_table(data):
-    df = pd.DataFrame(data)
-    html_table = df.to_html(index=False)
-
-    styled_html = f"""
-        <html>
-        <head>
-        <style>
-            body {{
-                display: flex;
-                align-items: center;
-                justify-content: center;
-                margin: 0;
-                background: white; /* Set background to transparent black (adjust the alpha value as needed) */
-                color: black; /* Set text color to white */
-            }}
-            th, td {{
-                text-align: center;
-            }}
-            table {{
-                border-collapse: collapse;
-                width: 80%;
-            }}
-            th, td {{
-                border: 1px solid black;
-                padding: 8px;
-            }}
-        </style>
-        </head>
-        <body>
-        {html_table}
-        </body>
-        </html>
-    """
-
-    return styled_html
-
-# Extract information from PDF
-def extract_info(pdf_path):
-    info = {
-        "Name": "",
-        "NPV": "",
-        "IRR": "",
-        "Phone no": "",
-        "Time taken": "",
-        "Budget": "",
-        "Email": "",
-        "Number of Previous works": ""
-    }
+import threading
+import json
+import time
+from flask import (Blueprint, Flask, Request, Response, current_app, g, render_template, request,
+                   jsonify, stream_template, stream_with_context, url_for)
+from extractor import field_extractor
+from extraction_cache import ExtractionCache, pdf_key
+from finance_cache import FinanceCache
+from metrics import REGISTRY, REQUEST_SECONDS, record_spans, span
+from render_cache import RenderCache
+from vagueness import VaguenessScan, vague_phrases
+
+# Heavy dependencies (pandas, numpy, scipy, matplotlib, pdfreader, firebase_admin)
+# are imported inside the functions that need them, so creating the app and
+# spawning workers stays fast and does not require credentials.
+
+# Defaults, each overridable by an environment variable of the same name
+DEFAULT_CONFIG = {
+    'STORAGE_BACKEND': 'firestore',
+    'FIREBASE_CREDENTIALS': 'rfpos-a18d7-firebase-adminsdk-wod3i-0456ff7ce6.json',
+    'SQLITE_PATH': 'tendoreasy.db',
+    # Uploads stay in memory up to UPLOAD_SPOOL_BYTES and spill to a private
+    # temp file above it, so concurrent requests never share a file on disk
+    'UPLOAD_SPOOL_BYTES': 8 * 1024 * 1024,
+    'MAX_UPLOAD_BYTES': 50 * 1024 * 1024,
+    # Whole-request limit, applied as Flask's MAX_CONTENT_LENGTH
+    'MAX_REQUEST_BYTES': 512 * 1024 * 1024,
+    'EXTRACT_WORKERS': os.cpu_count() or 1,
+    'EXTRACT_CACHE_DIR': '.extract_cache',
+    'EXTRACT_CACHE_MAX_ENTRIES': 1000,
+    'EXTRACT_CACHE_MAX_BYTES': 64 * 1024 * 1024,
+    'FINANCE_CACHE_TTL': 60.0,
+    'FINANCE_CACHE_LISTEN': True,
+    # Tenders whose finance caches (and listeners) are kept at once
+    'FINANCE_CACHE_MAX_TENDERS': 64,
+    # Finance listings are read one page of this many records at a time
+    'FINANCE_PAGE_SIZE': 50,
+    'FINANCE_MAX_PAGE_SIZE': 500,
+    # Records per CSV chunk, XLSX batch or Parquet row group in exports
+    'EXPORT_BATCH_SIZE': 500,
+    'SCORING_WEIGHTS_FILE': 'scoring_weights.json',
+    # Ranked vendors published per tender, as many as /rank shows
+    'PUBLISHED_RANKS': 3,
+    # Background extraction jobs; JOB_WORKERS=0 disables the job runner
+    'JOBS_DIR': '.jobs',
+    'JOB_WORKERS': 2,
+    'JOB_MAX_PENDING': 100,
+    'JOB_TIMEOUT': 300.0,
+    'TEXT_INDEX_PATH': 'text_index.db',
+    'METRICS_ENABLED': True,
+    # With PROFILING_ENABLED, a request sending PROFILE_HEADER is run under
+    # cProfile and answered with the profile instead of its response
+    'PROFILING_ENABLED': False,
+    'PROFILE_HEADER': 'X-Profile',
+    'PROFILE_TOP_FUNCTIONS': 40
+}
+
+def load_config(environ=os.environ):
+    config = {}
+    for key, default in DEFAULT_CONFIG.items():
+        value = environ.get(key)
+        if value is None:
+            config[key] = default
+        elif isinstance(default, bool):
+            config[key] = value.lower() in ('1', 'true', 'yes')
+        else:
+            config[key] = type(default)(value)
+    return config
+
+class UploadRequest(Request):
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return SpooledTemporaryFile(max_size=current_app.config['UPLOAD_SPOOL_BYTES'], mode='rb+')
+
+class Services:
+    # Per-app state. Every dependency is built on first use, so Firebase is
+    # only initialized when the first request actually touches storage.
+    def __init__(self, app):
+        self.app = app
+        self.config = app.config
+        self.ranking_indexes = {}
+        self.ranking_lock = threading.Lock()
+        # Rankings this process last published, per tender
+        self.published_rankings = {}
+        self.publish_lock = threading.Lock()
+        self.frame_cache = {}
+        self.vendor_terms = {}
+        self.finance_caches = OrderedDict()
+        self.finance_cache_lock = threading.Lock()
+
+    @cached_property
+    def storage(self):
+        from storage import InstrumentedStorage, create_storage
+        return InstrumentedStorage(create_storage(self.config))
+
+    @cached_property
+    def extraction_cache(self):
+        return ExtractionCache(
+            self.config['EXTRACT_CACHE_DIR'],
+            max_entries=self.config['EXTRACT_CACHE_MAX_ENTRIES'],
+            max_bytes=self.config['EXTRACT_CACHE_MAX_BYTES']
+        )
+
+    # Cache of every finance record
+    @property
+    def finance_cache(self):
+        return self.finance_cache_for()
+
+    # Cache of one tender's finance records, limited to `fields` if given.
+    # A tender's caches share the listener of its full-record cache, each
+    # field set projected from it. Beyond FINANCE_CACHE_MAX_TENDERS the least
+    # recently used tender's caches are closed, so only active tenders keep
+    # a listener.
+    def finance_cache_for(self, tender=None, fields=None):
+        key = tuple(fields) if fields else None
+        with self.finance_cache_lock:
+            caches = self.finance_caches.get(tender)
+            if caches is None:
+                caches = {None: self._finance_cache(tender)}
+                self.finance_caches[tender] = caches
+                while len(self.finance_caches) > self.config['FINANCE_CACHE_MAX_TENDERS']:
+                    self._evict_finance_caches(*self.finance_caches.popitem(last=False))
+            else:
+                self.finance_caches.move_to_end(tender)
+            cache = caches.get(key)
+            if cache is None:
+                cache = caches[key] = self._finance_cache(tender, fields, source=caches[None])
+            return cache
+
+    def _finance_cache(self, tender, fields=None, source=None):
+        return FinanceCache(
+            self.storage,
+            ttl=self.config['FINANCE_CACHE_TTL'],
+            listen=self.config['FINANCE_CACHE_LISTEN'],
+            tender=tender,
+            fields=fields,
+            source=source
+        )
+
+    def _evict_finance_caches(self, tender, caches):
+        for cache in caches.values():
+            cache.close()
+        self.ranking_indexes.pop(tender, None)
+        for key in [key for key in list(self.frame_cache) if key[0] == tender]:
+            self.frame_cache.pop(key, None)
+
+    # Every finance cache built so far
+    def all_finance_caches(self):
+        return [cache for caches in list(self.finance_caches.values())
+                for cache in list(caches.values())]
+
+    @cached_property
+    def tender_weights(self):
+        from scoring import load_tender_weights
+        return load_tender_weights(self.config['SCORING_WEIGHTS_FILE'])
+
+    @cached_property
+    def render_cache(self):
+        return RenderCache()
+
+    @cached_property
+    def chart_cache(self):
+        from charts import ChartCache
+        return ChartCache()
 
-    with open(pdf_path, "rb") as file:
-        doc = PDFDocument(file)
-        viewer = SimplePDFViewer(file)
-        for _ in doc.pages():
-            viewer.render()
-            page_text = ''.join(viewer.canvas.strings)
-
-            # Updated extraction method with error handling
-            try:
-                info["Name"] = re.search(r'Name:(\w+)', page_text).group(1)
-                info["NPV"] = re.search(r'NPV:(\d+)', page_text).group(1)
-                info["IRR"] = re.search(r'IRR:(\d+)', page_text).group(1)
-                phone_match = re.search(r'Phone no:(\d+)', page_text)
-                info["Phone no"] = phone_match.group(1) if phone_match else ""
-                info["Time taken"] = re.search(r'Time taken:(\d+)', page_text).group(1)
-                info["Budget"] = re.search(r'Budget:(\d+)', page_text).group(1)
-                info["Email"] = re.search(r'Email:\s*([\w\.-]+@[\w\.-]+)', page_text).group(1)
-                prev_works_match = re.search(r'Number of Previous works:(\d+)', page_text)
-                info["Number of Previous works"] = prev_works_match.group(1) if prev_works_match else ""
-
-            except AttributeError:
-                print("Error: Attribute not found in PDF content.")
-                # Handle the error here
-
-    return info
-
-# Publish HTML content
-def publish_html(html_content):
-    file_path = os.path.join(TEMPLATES_DIR, "finance_data.html")
-
-    with open(file_path, "w") as f:
-        f.write(html_content)
-
-# Generate budget bar graph
-def generate_budget_bar_graph(data):
-    names = [entry["Name"] for entry in data]
-    budget_values = [entry["Budget"] for entry in data]
-
-    plt.figure(figsize=(12, 6))
-    plt.bar(np.arange(len(names)), budget_values)
-    plt.title('Budget Values by Name')
-    plt.xlabel('Names')
-    plt.ylabel('Budget (in lakhs)')
-    plt.xticks(np.arange(len(names)), names, rotation=45, ha='right')
-    plt.tight_layout()
-
-    buffer = BytesIO()
-    plt.savefig(buffer, format='png')
-    buffer.seek(0)
-
-    plot_base64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
-
-    html_content = f"""
-        <!DOCTYPE html>
-        <html lang="en">
-        <head>
-            <meta charset="UTF-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            <title>Budget Bar Graph</title>
-            <style>
-                body {{
-                    display: flex;
-                    justify-content: center;
-                    align-items: center;
-                    height: 100vh; /* Set the height of the body to the full viewport height */
-                    margin: 0; /* Remove default margin */
-                    background-color: #f0f0f0; /* Set background color */
-                }}
-                .container {{
-                    text-align: center; /* Center the content horizontally */
-                }}
-                img {{
-                    max-width: 100%; /* Ensure the image does not exceed the container width */
-                    max-height: 100%; /* Ensure the image does not exceed the container height */
-                }}
-            </style>
-        </head>
-        <body>
-            <div class="container">
-                <h1>Budget Bar Graph</h1>
-                <img src="data:image/png;base64,{plot_base64}" alt="Budget Bar Graph">
-            </div>
-        </body>
-        </html>
-    """
-
-    file_path = os.path.join(TEMPLATES_DIR, 'budget_bar_graph.html')
-
-    with open(file_path, 'w') as f:
-        f.write(html_content)
-
-    return html_content
-
-def retrieve_finance_data():
-    finance_ref = db.collection('finance')
-    finance_data = [doc.to_dict() for doc in finance_ref.stream()]
-    return finance_data
-
-def screen_ideas(ideas):
-    criteria_weights = {
-        'budget': 0.3,
-        'NPV': 0.4,
-        'IRR': 0.3
+    # Process pool shared by batch requests
+    @cached_property
+    def extract_pool(self):
+        return ProcessPoolExecutor(max_workers=self.config['EXTRACT_WORKERS'])
+
+    @cached_property
+    def text_index(self):
+        from text_index import TextIndex
+        return TextIndex(self.config['TEXT_INDEX_PATH'])
+
+    @cached_property
+    def job_queue(self):
+        from jobs import JobQueue
+        return JobQueue(
+            self.config['JOBS_DIR'],
+            # Page text is spooled next to the job, so a resumed job finds it
+            partial(extract_document, spool_dir=self.config['JOBS_DIR']),
+            on_complete=self.finish_job,
+            workers=self.config['JOB_WORKERS'],
+            max_pending=self.config['JOB_MAX_PENDING'],
+            timeout=self.config['JOB_TIMEOUT']
+        )
+
+    # Runs on a job worker thread once a job's extraction has succeeded;
+    # returns the result to keep on the job
+    def finish_job(self, job):
+        with self.app.app_context():
+            return store_extraction(job['key'], job['result'], filename=job['filename'],
+                                    tender=job['tender'])
+
+def services():
+    return current_app.extensions['tendoreasy']
+
+# Tender ids become document ids and URL segments, so they must be
+# non-blank and free of '/'
+def valid_tender(tender):
+    return isinstance(tender, str) and bool(tender.strip()) and '/' not in tender
+
+# Retrieve a tender's finance data (served from the shared finance cache)
+def retrieve_from_firebase(tender=None):
+    return services().finance_cache_for(tender).get()
+
+# Columns of the finance listing, as written by record_finance
+FINANCE_COLUMNS = ["Name", "Budget", "NPV", "IRR", "Phone No", "Email", "Time taken",
+                   "Number of Previous works", "Vagueness"]
+
+# Listing parameters from the query string: tender, sort, order (asc or
+# desc), limit and cursor. Raises ValueError for an unknown sort or order.
+def finance_page_args():
+    from storage import FINANCE_SORT_FIELDS
+
+    sort = request.args.get('sort', 'Name')
+    order = request.args.get('order', 'asc')
+    if sort not in FINANCE_SORT_FIELDS:
+        raise ValueError(f"Sort must be one of {', '.join(FINANCE_SORT_FIELDS)}.")
+    if order not in ('asc', 'desc'):
+        raise ValueError("Order must be 'asc' or 'desc'.")
+    config = current_app.config
+    limit = request.args.get('limit', config['FINANCE_PAGE_SIZE'], type=int)
+    return {
+        "tender": request.args.get('tender'),
+        "sort": sort,
+        "order": order,
+        "limit": max(1, min(limit, config['FINANCE_MAX_PAGE_SIZE'])),
+        "cursor": request.args.get('cursor')
     }
 
-    finance_data = retrieve_finance_data()
-    if not finance_data:
-        print("No finance data found in Firestore.")
-        return [], []
+def read_finance_page(args):
+    return services().storage.read_finance_page(
+        args["tender"], sort=args["sort"], descending=args["order"] == 'desc',
+        limit=args["limit"], cursor=args["cursor"])
+
+class FinanceTableRows:
+    # Rows of one listing page for the streamed table. The page is read when
+    # the template first iterates it, after the page head has been sent;
+    # next_cursor is known once the rows are done.
+    def __init__(self, args, columns):
+        self.args = args
+        self.columns = columns
+        self.next_cursor = None
+
+    def __iter__(self):
+        items, self.next_cursor = read_finance_page(self.args)
+        for _, record in items:
+            yield [record.get(column, "") for column in self.columns]
+
+# Stream one page of the finance listing as an HTML table
+def create_html_table(args):
+    from storage import FINANCE_SORT_FIELDS
+
+    columns = FINANCE_COLUMNS if args["tender"] is not None else FINANCE_COLUMNS + ["tender"]
+    return stream_template('finance_data.html', columns=columns,
+                           rows=FinanceTableRows(args, columns), sortable=FINANCE_SORT_FIELDS,
+                           args=args)
+
+# Extract information from PDF (accepts a path or a binary file object)
+# Returns the field values and the list of fields that were not found;
+# progress(pages_done, pages_total) is called after each page if given.
+# If on_page(page_number, text) is given, every page is read and passed to it.
+# Seconds spent parsing the PDF and matching fields are added to `timings`.
+def extract_info(pdf_path, progress=None, on_page=None, timings=None):
+    from pdf_text import PageTextReader
+
+    info = field_extractor.new_info()
+    timings = {} if timings is None else timings
+    timings.setdefault("pdf_parse", 0.0)
+    timings.setdefault("field_extraction", 0.0)
 
-    screened_ideas = []
+    file = open(pdf_path, "rb") if isinstance(pdf_path, str) else pdf_path
+    with file:
+        started = time.perf_counter()
+        reader = PageTextReader(file)
+        pages_total = reader.page_count
+        complete = False
+        for pages_done, page_text in enumerate(reader, start=1):
+            parsed = time.perf_counter()
+            timings["pdf_parse"] += parsed - started
+            if progress is not None:
+                progress(pages_done, pages_total)
+            if not complete:
+                complete = field_extractor.scan(page_text, info)
+                timings["field_extraction"] += time.perf_counter() - parsed
+            if on_page is not None:
+                on_page(pages_done, page_text)
+            # Fields usually sit in the first few pages; stop once all are found
+            elif complete:
+                break
+            started = time.perf_counter()
 
-    for data in finance_data:
-        Budget = data.get('Budget')
-        NPV = data.get('NPV')
-        IRR = data.get('IRR')
-        Name = data.get('Name')  # Ensure 'Name' is properly extracted
+    return info, field_extractor.missing(info)
 
-        if Budget is None or NPV is None or IRR is None or Name is None:  # Check if 'Name' exists
-            print("Missing data in finance document.")
+# Fields, the vagueness analysis and the text of every page (for the
+# search index), all from one pass over the pages. Page text is written to a
+# spool file in `spool_dir` (the temp directory by default) as it is read,
+# so memory stays flat however long the document; the result carries the
+# file's path as "pages_path" and store_extraction() removes it. Step
+# timings are returned rather than recorded, since this may run in a worker
+# process; the app records them when it stores the result.
+def extract_document(pdf_path, progress=None, spool_dir=None):
+    vagueness = VaguenessScan(vague_phrases)
+    timings = {"vagueness_scan": 0.0}
+    fd, pages_path = mkstemp(suffix='.pages', dir=spool_dir)
+    try:
+        with open(fd, 'w', encoding='utf-8') as spool:
+            def on_page(number, text):
+                spool.write(json.dumps(text) + '\n')
+                started = time.perf_counter()
+                vagueness.feed(number, text)
+                timings["vagueness_scan"] += time.perf_counter() - started
+
+            info, missing = extract_info(pdf_path, progress=progress, on_page=on_page,
+                                         timings=timings)
+    except BaseException:
+        os.remove(pages_path)
+        raise
+    return {"info": info, "missing": missing, "vagueness": vagueness.result(),
+            "pages_path": pages_path, "timings": timings}
+
+# Page texts spooled by extract_document(), one JSON string per line
+def spooled_pages(pages_path):
+    with open(pages_path, encoding='utf-8') as spool:
+        for line in spool:
+            yield json.loads(line)
+
+class UploadTooLarge(ValueError):
+    pass
+
+# Hash an uploaded stream, enforcing the per-file size limit
+def upload_key(stream):
+    limit = current_app.config['MAX_UPLOAD_BYTES']
+    key, size = pdf_key(stream)
+    if size > limit:
+        raise UploadTooLarge(f"File exceeds the {limit} byte upload limit.")
+    return key
+
+# Extract from an uploaded stream, reusing the result of an identical earlier upload
+def extract_info_cached(stream, filename=None, tender=None):
+    key = upload_key(stream)
+    result = services().extraction_cache.get(key)
+    if result is None:
+        return store_extraction(key, extract_document(stream), filename=filename, tender=tender)
+    reuse_extraction(key, result, filename=filename, tender=tender)
+    return result
+
+# Id of a document kept per tender: "<tender>:<name>". Names (vendor names,
+# extraction keys) never contain ':', so everything before the last ':' is
+# the tender whatever its id holds, and two tenders cannot share a document.
+def tender_document_id(name, tender=None):
+    return name if tender is None else f"{tender}:{name}"
+
+# Stored extractions are kept per tender, like finance records, so the same
+# PDF submitted to two tenders is recorded for both
+def extraction_id(key, tender=None):
+    return tender_document_id(key, tender)
+
+# Keep a fresh extraction: index its page text, cache it and record its fields.
+# Returns the result without the page text and timings.
+def store_extraction(key, result, filename=None, tender=None, publish=True):
+    record_spans(result.pop("timings", {}))
+    pages_path = result.pop("pages_path")
+    try:
+        services().text_index.add(key, spooled_pages(pages_path), tender=tender,
+                                  vendor=result["info"]["Name"] or None, filename=filename)
+    finally:
+        # A resumed job may have indexed and removed it already
+        try:
+            os.remove(pages_path)
+        except OSError:
+            pass
+    services().extraction_cache.put(key, result)
+    services().storage.save_extraction(extraction_id(key, tender), result, filename=filename,
+                                       tender=tender)
+    record_finance(result["info"], tender=tender, vagueness=result["vagueness"]["score"],
+                   publish=publish)
+    return result
+
+# A cached upload is made searchable under this tender from its indexed text,
+# and its extraction and finance fields are recorded for the tender, which
+# may differ from the one it was first uploaded under
+def reuse_extraction(key, result, filename=None, tender=None, publish=True):
+    services().text_index.copy(key, tender=tender, vendor=result["info"]["Name"] or None,
+                               filename=filename)
+    services().storage.save_extraction(extraction_id(key, tender), result, filename=filename,
+                                       tender=tender)
+    record_finance(result["info"], tender=tender, vagueness=result["vagueness"]["score"],
+                   publish=publish)
+
+# Worker entry point for batch extraction; runs in a pool process
+def _extract_batch_item(filename, data):
+    try:
+        return filename, extract_document(BytesIO(data)), None
+    except Exception as e:
+        return filename, None, f"{type(e).__name__}: {e}"
+
+# Extract many uploads in parallel, returning per-file results and errors
+# Files already in the extraction cache never reach the pool; the tender's
+# rankings are published once, after the whole batch is recorded
+def extract_batch(uploads, tender=None):
+    extraction_cache = services().extraction_cache
+    pool = services().extract_pool
+    outcomes = []
+    for upload in uploads:
+        try:
+            key = upload_key(upload.stream)
+        except UploadTooLarge as e:
+            outcomes.append((upload.filename, None, e))
+            continue
+        cached = extraction_cache.get(key)
+        if cached is not None:
+            reuse_extraction(key, cached, filename=upload.filename, tender=tender, publish=False)
+            outcomes.append((upload.filename, key, cached))
+        else:
+            future = pool.submit(_extract_batch_item, upload.filename, upload.stream.read())
+            outcomes.append((upload.filename, key, future))
+
+    results, errors = [], []
+    for filename, key, outcome in outcomes:
+        if isinstance(outcome, Exception):
+            errors.append({"filename": filename, "error": str(outcome)})
+            continue
+        if isinstance(outcome, dict):
+            results.append({"filename": filename, **outcome})
+            continue
+        _, result, error = outcome.result()
+        if error is None:
+            result = store_extraction(key, result, filename=filename, tender=tender,
+                                      publish=False)
+            results.append({"filename": filename, **result})
+        else:
+            errors.append({"filename": filename, "error": error})
+    if results:
+        publish_rankings(tender)
+    return results, errors
+
+# Vendor names and budgets of a FinanceTable, skipping records without one
+def budget_series(table):
+    budgets, missing = table.column('Budget')
+    return table.names[~missing].tolist(), budgets[~missing].tolist()
+
+# Budget bar chart for the given finance table; returns its key and bytes
+def generate_budget_bar_graph(table, fmt='png'):
+    from charts import chart_key, render_bar_chart
+
+    names, budget_values = budget_series(table)
+    key = chart_key('budget', names, budget_values)
+    def render():
+        with span('chart_render'):
+            return render_bar_chart(names, budget_values, 'Budget Values by Name', 'Names',
+                                    'Budget (in lakhs)', fmt=fmt)
+
+    body = services().chart_cache.get_or_render(key, fmt, render)
+    return key, body
+
+def retrieve_finance_data(tender=None):
+    return services().finance_cache_for(tender).get()
+
+def weights_for(tender):
+    from scoring import DEFAULT_WEIGHTS
+    return services().tender_weights.get(tender, DEFAULT_WEIGHTS)
+
+# The only fields scoring reads: the vendor name and the tender's criteria
+def scoring_fields(tender):
+    return ['Name', *weights_for(tender)]
+
+# Finance cache holding just the scoring fields of a tender's records
+def scoring_cache(tender=None):
+    return services().finance_cache_for(tender, scoring_fields(tender))
+
+# Columnar view of a tender's finance data, built from the typed columns of
+# its cache and rebuilt only when they are. Frames are kept per finance
+# cache (tender and fields) and by whether incomplete rows are kept.
+def retrieve_finance_frame(tender=None, criteria=None, complete=True):
+    state = services()
+    criteria = tuple(criteria or weights_for(tender))
+    fields = ['Name', *criteria]
+    table = state.finance_cache_for(tender, fields).table()
+    key = (tender, tuple(fields), complete)
+    cached = state.frame_cache.get(key)
+    if cached is None or cached[0] is not table:
+        cached = (table, table.frame(criteria, complete))
+        state.frame_cache[key] = cached
+    return cached[1]
+
+# Recommendation weights: the defaults, overridden per criterion by query
+# parameters such as ?weight.Budget=0.4&weight.Time%20taken=0. Raises
+# ValueError for an unknown criterion or a negative or non-numeric weight.
+def recommendation_weights(args):
+    from recommendation import RECOMMENDATION_WEIGHTS
+
+    weights = dict(RECOMMENDATION_WEIGHTS)
+    for key, value in args.items():
+        if not key.startswith('weight.'):
             continue
+        criterion = key[len('weight.'):]
+        if criterion not in weights:
+            raise ValueError(f"Weights apply to {', '.join(RECOMMENDATION_WEIGHTS)}.")
+        try:
+            weights[criterion] = float(value)
+        except ValueError:
+            raise ValueError(f"Weight of {criterion} must be a number.")
+        if not 0 <= weights[criterion] < float('inf'):
+            raise ValueError(f"Weight of {criterion} must be a finite, non-negative number.")
+    return weights
+
+# Criteria shown next to each ranked vendor, whatever a tender scores on
+DISPLAY_CRITERIA = ('Budget', 'NPV', 'IRR')
+
+# Ranking index entries as screen_ideas() tuples
+def display_rows(index, k=None):
+    rows = []
+    for score, *values, name in index.top(k):
+        values = dict(zip(index.criteria, values))
+        rows.append((score, *(values.get(column) for column in DISPLAY_CRITERIA), name))
+    return rows
+
+# Score vendors on normalized Budget (inverted), NPV and IRR. `ideas` may be a
+# list of finance records; by default the stored finance data is ranked.
+# Returns (score, Budget, NPV, IRR, Name) tuples, best first, limited to top_ranks;
+# values the tender's weights do not score on are None.
+def screen_ideas(ideas, tender=None, weights=None, method='minmax', top_ranks=None):
+    from scoring import finance_frame, score_frame, top_k
+
+    weights = weights or weights_for(tender)
+    if ideas is not None:
+        frame = finance_frame(ideas, criteria=tuple(weights))
+    else:
+        frame = retrieve_finance_frame(tender)
+    if frame.empty:
+        print("No finance data found.")
+        return []
 
-        total_score = (Budget * criteria_weights['budget'] +
-                       NPV * criteria_weights['NPV'] +
-                       IRR * criteria_weights['IRR'])
+    with span('scoring'):
+        scores = score_frame(frame, weights, method)
+        order = top_k(scores, top_ranks)
+    ranked = frame.iloc[order]
+    columns = [ranked[column].tolist() if column in ranked else [None] * len(ranked)
+               for column in DISPLAY_CRITERIA]
+    return list(zip(scores[order].tolist(), *columns, ranked['Name'].tolist()))
 
-        screened_ideas.append((total_score, Budget, NPV, IRR, Name))  # Include all necessary data
+# Comparison report rows for each tender, in batches of `batch_size`: every
+# finance record with its score and rank from screen_ideas(). Scoring reads
+# only the scoring fields of a tender; full records are then paged through
+# by vendor name, so one batch of them is held at a time.
+def comparison_batches(tenders, method='minmax', batch_size=500):
+    storage = services().storage
+    for tender in tenders:
+        ranked = screen_ideas(storage.read_finance(tender, fields=scoring_fields(tender)),
+                              tender=tender, method=method)
+        ranks = {name: (rank, score) for rank, (score, *_, name) in enumerate(ranked, start=1)}
+        cursor = None
+        while True:
+            items, cursor = storage.read_finance_page(tender, limit=batch_size, cursor=cursor)
+            batch = []
+            for _, record in items:
+                rank, score = ranks.get(record.get("Name"), (None, None))
+                batch.append(dict(record, tender=tender, rank=rank, score=score))
+            if batch:
+                yield batch
+            if cursor is None:
+                break
 
-    # Sort scores in descending order
-    sorted_screened_ideas = sorted(screened_ideas, key=lambda x: x[0], reverse=True)
+# Store the finance fields of a freshly extracted RFP, with its vagueness
+# score if known. Fields are parsed and validated here, once; an RFP without
+# valid Name, Budget, NPV and IRR is not recorded. The storage watcher then
+# feeds the change to the tender's finance caches; the ranking index takes it
+# at once, and unless `publish` is False the tender's published rankings are
+# brought up to date.
+def record_finance(info, tender=None, vagueness=None, publish=True):
+    from finance_records import FinanceRecord, InvalidFinanceRecord
 
-    return sorted_screened_ideas
+    try:
+        record = FinanceRecord.from_info(info, vagueness=vagueness)
+    except InvalidFinanceRecord as e:
+        print(f"Finance fields not recorded: {e}")
+        return
+    doc_id = tender_document_id(record.name, tender)
+    data = record.to_dict()
+    services().storage.write_finance(doc_id, data, tender=tender)
+    # The watcher may deliver the write later; applying it twice is harmless
+    ranking_index_for(tender).apply([('modified', doc_id, data)])
+    if publish:
+        publish_rankings(tender)
 
-def push_to_firebase(screened_ideas):
-    for index, (score, budget, npv, irr, name) in enumerate(screened_ideas, start=1):
-        doc_ref = db.collection(u'rank').document(f'idea_{index}')
-        doc_ref.set({
-            u'score': score,
-            u'budget': budget,
-            u'npv': npv,
-            u'irr': irr,
-            u'name': name
-        })
-    print("Screened ideas pushed to Firebase successfully.")
+# Incrementally maintained min-max ranking for a tender (None ranks everything),
+# following the tender's scoring cache
+def ranking_index_for(tender=None):
+    from ranking_index import RankingIndex
+
+    state = services()
+    cache = scoring_cache(tender)
+    with state.ranking_lock:
+        entry = state.ranking_indexes.get(tender)
+        if entry is None or entry[0] is not cache:
+            index = RankingIndex(weights_for(tender))
+            cache.subscribe(index.follow)
+            index.reset(cache.items())
+            entry = (cache, index)
+            state.ranking_indexes[tender] = entry
+        return entry[1]
+
+# Publish a tender's rankings, writing only the positions that differ from
+# what this process last published. The stored rankings are read once per
+# tender as the first baseline.
+def push_to_firebase(screened_ideas, tender=None):
+    state = services()
+    rankings = [{
+        u'score': score,
+        u'budget': budget,
+        u'npv': npv,
+        u'irr': irr,
+        u'name': name
+    } for score, budget, npv, irr, name in screened_ideas]
+    with state.publish_lock:
+        previous = state.published_rankings.get(tender)
+        if previous is None:
+            previous = state.storage.read_rankings(tender)
+        if rankings == previous:
+            return
+        commits = state.storage.write_rankings(rankings, previous=previous, tender=tender)
+        state.published_rankings[tender] = rankings
+    print(f"Screened ideas pushed to storage in {commits} batch(es).")
+
+# Publish the top PUBLISHED_RANKS of a tender's ranking index
+def publish_rankings(tender=None):
+    index = ranking_index_for(tender)
+    push_to_firebase(display_rows(index, current_app.config['PUBLISHED_RANKS']), tender=tender)
+
+# Distinct terms of each vendor's submissions to a tender, recomputed only
+# when the tender gains a document
+def vendor_term_sets(tender):
+    from tender_requirements import term_set
+
+    state = services()
+    count = state.text_index.count(tender)
+    cached = state.vendor_terms.get(tender)
+    if cached is None or cached[0] != count:
+        texts = state.text_index.vendor_texts(tender)
+        cached = (count, {vendor: term_set(text) for vendor, text in texts.items()})
+        state.vendor_terms[tender] = cached
+    return cached[1]
+
+# Vendor x requirement compliance for a tender from the indexed text of its
+# submissions. Returns the requirements, vendors, coverage matrix and a
+# per-vendor share of requirements met in each category.
+def tender_compliance(tender):
+    from tender_requirements import COMPLIANCE_THRESHOLD, compliance_matrix
+
+    requirements = services().storage.read_requirements(tender)
+    with span('compliance'):
+        vendors, coverage = compliance_matrix(requirements, vendor_term_sets(tender))
+    compliant = coverage >= COMPLIANCE_THRESHOLD
+    categories = [requirement["category"] for requirement in requirements]
+    summary = {}
+    for category in dict.fromkeys(categories):
+        mask = [c == category for c in categories]
+        for vendor, share in zip(vendors, compliant[:, mask].mean(axis=1).tolist()):
+            summary.setdefault(vendor, {})[category] = round(share, 4)
+    return requirements, vendors, coverage, summary
+
+# Hit and miss counts of the caches built so far, and the finance caches'
+# reads, as extra metric families for /metrics
+def cache_metrics(state):
+    counts = {name: (state.__dict__[name].hits, state.__dict__[name].misses)
+              for name in ('extraction_cache', 'render_cache', 'chart_cache')
+              if name in state.__dict__}
+    finance_caches = state.all_finance_caches()
+    counts['finance_cache'] = (sum(cache.hits for cache in finance_caches),
+                               sum(cache.misses for cache in finance_caches))
+    return [
+        ('tendoreasy_cache_hits_total', 'counter', 'Lookups served from a cache.',
+         [({'cache': name}, hits) for name, (hits, _) in counts.items()]),
+        ('tendoreasy_cache_misses_total', 'counter', 'Lookups a cache could not serve.',
+         [({'cache': name}, misses) for name, (_, misses) in counts.items()]),
+        ('tendoreasy_cache_hit_ratio', 'gauge', 'Share of lookups served from a cache.',
+         [({'cache': name}, hits / (hits + misses) if hits + misses else 0.0)
+          for name, (hits, misses) in counts.items()]),
+        ('tendoreasy_finance_cache_reads_total', 'counter',
+         'Finance documents read into the finance caches (listener updates count changed '
+         'documents only).', [({}, sum(cache.reads for cache in finance_caches))])
+    ]
+
+# Text report of a profiled request, sorted by the profile header's value when
+# it names a pstats sort key (e.g. tottime), otherwise by cumulative time
+def profile_report(profiler, response):
+    import io
+    import pstats
+
+    out = io.StringIO()
+    stats = pstats.Stats(profiler, stream=out)
+    try:
+        stats.sort_stats(request.headers.get(current_app.config['PROFILE_HEADER']))
+    except KeyError:
+        stats.sort_stats('cumulative')
+    stats.print_stats(current_app.config['PROFILE_TOP_FUNCTIONS'])
+    return Response(out.getvalue(), mimetype='text/plain',
+                    headers={'X-Profiled-Status': str(response.status_code)})
 
 def generate_html_table(screened_ideas, top_ranks=3):
-    html_content = """
-    <html>
-    <head>
-        <title>Screened Ideas</title>
-        <style>
-            table {
-                border-collapse: collapse;
-                width: 100%;
-                text-align: center;
-            }
-            th, td {
-                border: 1px solid #dddddd;
-                text-align: left;
-                padding: 8px;
-                text-align: center;
-            }
-            th {
-                background-color: #f2f2f2;
-                text-align: center;
-            }
-            @import url('https://fonts.googleapis.com/css2?family=Sen&display=swap');
-
-            html, body {
-              height: 100%;
-              width:100%;
-              margin: 0;
-              padding: 0;
-              font-size: 10vw;
-              background-color: #ddf0e9;
-              text-align: center;
-            }
-
-
-            h1, h2 {
-              text-align: center;
-              margin: 0; 
-              font-family: 'Sen', sans-serif;
-            }
-
-            #confetti{
-              position: absolute;
-              left: 0;
-              top: 0;
-              height: 100%;
-              width: 100%;
-            }
-        </style>
-    </head>
-    <body>
-        <p>Top 3 Screened Ideas</p>
-        <table>
-            <tr>
-                <th>Rank</th>
-                <th>Score</th>
-                <th>Budget</th>
-                <th>NPV</th>
-                <th>IRR</th>
-                <th>Name</th>
-            </tr>
-    """
-
-    for rank, (score, budget, npv, irr, name) in enumerate(screened_ideas[:top_ranks], start=1):
-        html_content += f"""
-            <tr>
-                <td>{rank}</td>
-                <td>{score}</td>
-                <td>{budget}</td>
-                <td>{npv}</td>
-                <td>{irr}</td>
-                <td>{name}</td>
-            </tr>
-        """
-
-    html_content += """
-        </table>
-        <!-- Confetti animation -->
-        <canvas id="confetti"></canvas>
-        <script>
-        var retina = window.devicePixelRatio,
-
-            // Math shorthands
-            PI = Math.PI,
-            sqrt = Math.sqrt,
-            round = Math.round,
-            random = Math.random,
-            cos = Math.cos,
-            sin = Math.sin,
-
-            // Local WindowAnimationTiming interface
-            rAF = window.requestAnimationFrame,
-            cAF = window.cancelAnimationFrame || window.cancelRequestAnimationFrame,
-            _now = Date.now || function () {return new Date().getTime();};
-
-        // Local WindowAnimationTiming interface polyfill
-        (function (w) {
-          /**
-                * Fallback implementation.
-                */
-          var prev = _now();
-          function fallback(fn) {
-            var curr = _now();
-            var ms = Math.max(0, 16 - (curr - prev));
-            var req = setTimeout(fn, ms);
-            prev = curr;
-            return req;
-          }
-
-          /**
-                * Cancel.
-                */
-          var cancel = w.cancelAnimationFrame
-          || w.webkitCancelAnimationFrame
-          || w.clearTimeout;
-
-          rAF = w.requestAnimationFrame
-          || w.webkitRequestAnimationFrame
-          || fallback;
-
-          cAF = function(id){
-            cancel.call(w, id);
-          };
-        }(window));
-
-        document.addEventListener("DOMContentLoaded", function() {
-          var speed = 50,
-              duration = (1.0 / speed),
-              confettiRibbonCount = 11,
-              ribbonPaperCount = 30,
-              ribbonPaperDist = 8.0,
-              ribbonPaperThick = 8.0,
-              confettiPaperCount = 95,
-              DEG_TO_RAD = PI / 180,
-              RAD_TO_DEG = 180 / PI,
-              colors = [
-                ["#df0049", "#660671"],
-                ["#00e857", "#005291"],
-                ["#2bebbc", "#05798a"],
-                ["#ffd200", "#b06c00"]
-              ];
-
-          function Vector2(_x, _y) {
-            this.x = _x, this.y = _y;
-            this.Length = function() {
-              return sqrt(this.SqrLength());
-            }
-            this.SqrLength = function() {
-              return this.x * this.x + this.y * this.y;
-            }
-            this.Add = function(_vec) {
-              this.x += _vec.x;
-              this.y += _vec.y;
-            }
-            this.Sub = function(_vec) {
-              this.x -= _vec.x;
-              this.y -= _vec.y;
-            }
-            this.Div = function(_f) {
-              this.x /= _f;
-              this.y /= _f;
-            }
-            this.Mul = function(_f) {
-              this.x *= _f;
-              this.y *= _f;
-            }
-            this.Normalize = function() {
-              var sqrLen = this.SqrLength();
-              if (sqrLen != 0) {
-                var factor = 1.0 / sqrt(sqrLen);
-                this.x *= factor;
-                this.y *= factor;
-              }
-            }
-            this.Normalized = function() {
-              var sqrLen = this.SqrLength();
-              if (sqrLen != 0) {
-                var factor = 1.0 / sqrt(sqrLen);
-                return new Vector2(this.x * factor, this.y * factor);
-              }
-              return new Vector2(0, 0);
-            }
-          }
-          Vector2.Lerp = function(_vec0, _vec1, _t) {
-            return new Vector2((_vec1.x - _vec0.x) * _t + _vec0.x, (_vec1.y - _vec0.y) * _t + _vec0.y);
-          }
-          Vector2.Distance = function(_vec0, _vec1) {
-            return sqrt(Vector2.SqrDistance(_vec0, _vec1));
-          }
-          Vector2.SqrDistance = function(_vec0, _vec1) {
-            var x = _vec0.x - _vec1.x;
-            var y = _vec0.y - _vec1.y;
-            return (x * x + y * y + z * z);
-          }
-          Vector2.Scale = function(_vec0, _vec1) {
-            return new Vector2(_vec0.x * _vec1.x, _vec0.y * _vec1.y);
-          }
-          Vector2.Min = function(_vec0, _vec1) {
-            return new Vector2(Math.min(_vec0.x, _vec1.x), Math.min(_vec0.y, _vec1.y));
-          }
-          Vector2.Max = function(_vec0, _vec1) {
-            return new Vector2(Math.max(_vec0.x, _vec1.x), Math.max(_vec0.y, _vec1.y));
-          }
-          Vector2.ClampMagnitude = function(_vec0, _len) {
-            var vecNorm = _vec0.Normalized;
-            return new Vector2(vecNorm.x * _len, vecNorm.y * _len);
-          }
-          Vector2.Sub = function(_vec0, _vec1) {
-            return new Vector2(_vec0.x - _vec1.x, _vec0.y - _vec1.y, _vec0.z - _vec1.z);
-          }
-
-          function EulerMass(_x, _y, _mass, _drag) {
-            this.position = new Vector2(_x, _y);
-            this.mass = _mass;
-            this.drag = _drag;
-            this.force = new Vector2(0, 0);
-            this.velocity = new Vector2(0, 0);
-            this.AddForce = function(_f) {
-              this.force.Add(_f);
-            }
-            this.Integrate = function(_dt) {
-              var acc = this.CurrentForce(this.position);
-              acc.Div(this.mass);
-              var posDelta = new Vector2(this.velocity.x, this.velocity.y);
-              posDelta.Mul(_dt);
-              this.position.Add(posDelta);
-              acc.Mul(_dt);
-              this.velocity.Add(acc);
-              this.force = new Vector2(0, 0);
-            }
-            this.CurrentForce = function(_pos, _vel) {
-              var totalForce = new Vector2(this.force.x, this.force.y);
-              var speed = this.velocity.Length();
-              var dragVel = new Vector2(this.velocity.x, this.velocity.y);
-              dragVel.Mul(this.drag * this.mass * speed);
-              totalForce.Sub(dragVel);
-              return totalForce;
-            }
-          }
-
-          function ConfettiPaper(_x, _y) {
-            this.pos = new Vector2(_x, _y);
-            this.rotationSpeed = (random() * 600 + 800);
-            this.angle = DEG_TO_RAD * random() * 360;
-            this.rotation = DEG_TO_RAD * random() * 360;
-            this.cosA = 1.0;
-            this.size = 5.0;
-            this.oscillationSpeed = (random() * 1.5 + 0.5);
-            this.xSpeed = 40.0;
-            this.ySpeed = (random() * 60 + 50.0);
-            this.corners = new Array();
-            this.time = random();
-            var ci = round(random() * (colors.length - 1));
-            this.frontColor = colors[ci][0];
-            this.backColor = colors[ci][1];
-            for (var i = 0; i < 4; i++) {
-              var dx = cos(this.angle + DEG_TO_RAD * (i * 90 + 45));
-              var dy = sin(this.angle + DEG_TO_RAD * (i * 90 + 45));
-              this.corners[i] = new Vector2(dx, dy);
-            }
-            this.Update = function(_dt) {
-              this.time += _dt;
-              this.rotation += this.rotationSpeed * _dt;
-              this.cosA = cos(DEG_TO_RAD * this.rotation);
-              this.pos.x += cos(this.time * this.oscillationSpeed) * this.xSpeed * _dt
-              this.pos.y += this.ySpeed * _dt;
-              if (this.pos.y > ConfettiPaper.bounds.y) {
-                this.pos.x = random() * ConfettiPaper.bounds.x;
-                this.pos.y = 0;
-              }
-            }
-            this.Draw = function(_g) {
-              if (this.cosA > 0) {
-                _g.fillStyle = this.frontColor;
-              } else {
-                _g.fillStyle = this.backColor;
-              }
-              _g.beginPath();
-              _g.moveTo((this.pos.x + this.corners[0].x * this.size) * retina, (this.pos.y + this.corners[0].y * this.size * this.cosA) * retina);
-              for (var i = 1; i < 4; i++) {
-                _g.lineTo((this.pos.x + this.corners[i].x * this.size) * retina, (this.pos.y + this.corners[i].y * this.size * this.cosA) * retina);
-              }
-              _g.closePath();
-              _g.fill();
-            }
-          }
-          ConfettiPaper.bounds = new Vector2(0, 0);
-
-          function ConfettiRibbon(_x, _y, _count, _dist, _thickness, _angle, _mass, _drag) {
-            this.particleDist = _dist;
-            this.particleCount = _count;
-            this.particleMass = _mass;
-            this.particleDrag = _drag;
-            this.particles = new Array();
-            var ci = round(random() * (colors.length - 1));
-            this.frontColor = colors[ci][0];
-            this.backColor = colors[ci][1];
-            this.xOff = (cos(DEG_TO_RAD * _angle) * _thickness);
-            this.yOff = (sin(DEG_TO_RAD * _angle) * _thickness);
-            this.position = new Vector2(_x, _y);
-            this.prevPosition = new Vector2(_x, _y);
-            this.velocityInherit = (random() * 2 + 4);
-            this.time = random() * 100;
-            this.oscillationSpeed = (random() * 2 + 2);
-            this.oscillationDistance = (random() * 40 + 40);
-            this.ySpeed = (random() * 40 + 80);
-            for (var i = 0; i < this.particleCount; i++) {
-              this.particles[i] = new EulerMass(_x, _y - i * this.particleDist, this.particleMass, this.particleDrag);
-            }
-            this.Update = function(_dt) {
-              var i = 0;
-              this.time += _dt * this.oscillationSpeed;
-              this.position.y += this.ySpeed * _dt;
-              this.position.x += cos(this.time) * this.oscillationDistance * _dt;
-              this.particles[0].position = this.position;
-              var dX = this.prevPosition.x - this.position.x;
-              var dY = this.prevPosition.y - this.position.y;
-              var delta = sqrt(dX * dX + dY * dY);
-              this.prevPosition = new Vector2(this.position.x, this.position.y);
-              for (i = 1; i < this.particleCount; i++) {
-                var dirP = Vector2.Sub(this.particles[i - 1].position, this.particles[i].position);
-                dirP.Normalize();
-                dirP.Mul((delta / _dt) * this.velocityInherit);
-                this.particles[i].AddForce(dirP);
-              }
-              for (i = 1; i < this.particleCount; i++) {
-                this.particles[i].Integrate(_dt);
-              }
-              for (i = 1; i < this.particleCount; i++) {
-                var rp2 = new Vector2(this.particles[i].position.x, this.particles[i].position.y);
-                rp2.Sub(this.particles[i - 1].position);
-                rp2.Normalize();
-                rp2.Mul(this.particleDist);
-                rp2.Add(this.particles[i - 1].position);
-                this.particles[i].position = rp2;
-              }
-              if (this.position.y > ConfettiRibbon.bounds.y + this.particleDist * this.particleCount) {
-                this.Reset();
-              }
-            }
-            this.Reset = function() {
-              this.position.y = -random() * ConfettiRibbon.bounds.y;
-              this.position.x = random() * ConfettiRibbon.bounds.x;
-              this.prevPosition = new Vector2(this.position.x, this.position.y);
-              this.velocityInherit = random() * 2 + 4;
-              this.time = random() * 100;
-              this.oscillationSpeed = random() * 2.0 + 1.5;
-              this.oscillationDistance = (random() * 40 + 40);
-              this.ySpeed = random() * 40 + 80;
-              var ci = round(random() * (colors.length - 1));
-              this.frontColor = colors[ci][0];
-              this.backColor = colors[ci][1];
-              this.particles = new Array();
-              for (var i = 0; i < this.particleCount; i++) {
-                this.particles[i] = new EulerMass(this.position.x, this.position.y - i * this.particleDist, this.particleMass, this.particleDrag);
-              }
-            };
-            this.Draw = function(_g) {
-              for (var i = 0; i < this.particleCount - 1; i++) {
-                var p0 = new Vector2(this.particles[i].position.x + this.xOff, this.particles[i].position.y + this.yOff);
-                var p1 = new Vector2(this.particles[i + 1].position.x + this.xOff, this.particles[i + 1].position.y + this.yOff);
-                if (this.Side(this.particles[i].position.x, this.particles[i].position.y, this.particles[i + 1].position.x, this.particles[i + 1].position.y, p1.x, p1.y) < 0) {
-                  _g.fillStyle = this.frontColor;
-                  _g.strokeStyle = this.frontColor;
-                } else {
-                  _g.fillStyle = this.backColor;
-                  _g.strokeStyle = this.backColor;
-                }
-                if (i == 0) {
-                  _g.beginPath();
-                  _g.moveTo(this.particles[i].position.x * retina, this.particles[i].position.y * retina);
-                  _g.lineTo(this.particles[i + 1].position.x * retina, this.particles[i + 1].position.y * retina);
-                  _g.lineTo(((this.particles[i + 1].position.x + p1.x) * 0.5) * retina, ((this.particles[i + 1].position.y + p1.y) * 0.5) * retina);
-                  _g.closePath();
-                  _g.stroke();
-                  _g.fill();
-                  _g.beginPath();
-                  _g.moveTo(p1.x * retina, p1.y * retina);
-                  _g.lineTo(p0.x * retina, p0.y * retina);
-                  _g.lineTo(((this.particles[i + 1].position.x + p1.x) * 0.5) * retina, ((this.particles[i + 1].position.y + p1.y) * 0.5) * retina);
-                  _g.closePath();
-                  _g.stroke();
-                  _g.fill();
-                } else if (i == this.particleCount - 2) {
-                  _g.beginPath();
-                  _g.moveTo(this.particles[i].position.x * retina, this.particles[i].position.y * retina);
-                  _g.lineTo(this.particles[i + 1].position.x * retina, this.particles[i + 1].position.y * retina);
-                  _g.lineTo(((this.particles[i].position.x + p0.x) * 0.5) * retina, ((this.particles[i].position.y + p0.y) * 0.5) * retina);
-                  _g.closePath();
-                  _g.stroke();
-                  _g.fill();
-                  _g.beginPath();
-                  _g.moveTo(p1.x * retina, p1.y * retina);
-                  _g.lineTo(p0.x * retina, p0.y * retina);
-                  _g.lineTo(((this.particles[i].position.x + p0.x) * 0.5) * retina, ((this.particles[i].position.y + p0.y) * 0.5) * retina);
-                  _g.closePath();
-                  _g.stroke();
-                  _g.fill();
-                } else {
-                  _g.beginPath();
-                  _g.moveTo(this.particles[i].position.x * retina, this.particles[i].position.y * retina);
-                  _g.lineTo(this.particles[i + 1].position.x * retina, this.particles[i + 1].position.y * retina);
-                  _g.lineTo(p1.x * retina, p1.y * retina);
-                  _g.lineTo(p0.x * retina, p0.y * retina);
-                  _g.closePath();
-                  _g.stroke();
-                  _g.fill();
-                }
-              }
-            }
-            this.Side = function(x1, y1, x2, y2, x3, y3) {
-              return ((x1 - x2) * (y3 - y2) - (y1 - y2) * (x3 - x2));
-            }
-          }
-          ConfettiRibbon.bounds = new Vector2(0, 0);
-          confetti = {};
-          confetti.Context = function(id) {
-            var i = 0;
-            var canvas = document.getElementById(id);
-            var canvasParent = canvas.parentNode;
-            var canvasWidth = canvasParent.offsetWidth;
-            var canvasHeight = canvasParent.offsetHeight;
-            canvas.width = canvasWidth * retina;
-            canvas.height = canvasHeight * retina;
-            var context = canvas.getContext('2d');
-            var interval = null;
-            var confettiRibbons = new Array();
-            ConfettiRibbon.bounds = new Vector2(canvasWidth, canvasHeight);
-            for (i = 0; i < confettiRibbonCount; i++) {
-              confettiRibbons[i] = new ConfettiRibbon(random() * canvasWidth, -random() * canvasHeight * 2, ribbonPaperCount, ribbonPaperDist, ribbonPaperThick, 45, 1, 0.05);
-            }
-            var confettiPapers = new Array();
-            ConfettiPaper.bounds = new Vector2(canvasWidth, canvasHeight);
-            for (i = 0; i < confettiPaperCount; i++) {
-              confettiPapers[i] = new ConfettiPaper(random() * canvasWidth, random() * canvasHeight);
-            }
-            this.resize = function() {
-              canvasWidth = canvasParent.offsetWidth;
-              canvasHeight = canvasParent.offsetHeight;
-              canvas.width = canvasWidth * retina;
-              canvas.height = canvasHeight * retina;
-              ConfettiPaper.bounds = new Vector2(canvasWidth, canvasHeight);
-              ConfettiRibbon.bounds = new Vector2(canvasWidth, canvasHeight);
-            }
-            this.start = function() {
-              this.stop()
-              var context = this;
-              this.update();
-            }
-            this.stop = function() {
-              cAF(this.interval);
-            }
-            this.update = function() {
-              var i = 0;
-              context.clearRect(0, 0, canvas.width, canvas.height);
-              for (i = 0; i < confettiPaperCount; i++) {
-                confettiPapers[i].Update(duration);
-                confettiPapers[i].Draw(context);
-              }
-              for (i = 0; i < confettiRibbonCount; i++) {
-                confettiRibbons[i].Update(duration);
-                confettiRibbons[i].Draw(context);
-              }
-              this.interval = rAF(function() {
-                confetti.update();
-              });
-            }
-          };
-          var confetti = new confetti.Context('confetti');
-          confetti.start();
-          window.addEventListener('resize', function(event){
-            confetti.resize();
-          });
-        });
-        </script>
-    </body>
-    </html>
-    """
-    file_path = os.path.join(TEMPLATES_DIR, 'screened_ideas.html')
-
-    with open(file_path, 'w') as f:
-        f.write(html_content)
-    return html_content
-
-@app.route('/')
+    return render_template('screened_ideas.html', screened_ideas=screened_ideas[:top_ranks],
+                           top_ranks=top_ranks)
+
+bp = Blueprint('tendoreasy', __name__)
+
+@bp.route('/')
 def index():
     return render_template('index.html')
 
-@app.route('/extract')
+@bp.route('/extract')
 def extract():
     return render_template('extract.html')
 
-@app.route('/extract_info', methods=['POST'])
+@bp.route('/extract_info', methods=['POST'])
 def handle_extract_info():
     pdf_file = request.files['pdfFile']
-    pdf_file.save('sample.pdf')
-    info = extract_info('sample.pdf')
-    return jsonify(info)
+    try:
+        return jsonify(extract_info_cached(pdf_file.stream, filename=pdf_file.filename,
+                                           tender=request.form.get('tender')))
+    except UploadTooLarge as e:
+        return jsonify({"error": str(e)}), 413
+
+@bp.route('/extract_batch', methods=['POST'])
+def handle_extract_batch():
+    uploads = request.files.getlist('pdfFiles')
+    if not uploads:
+        return jsonify({"error": "No files uploaded under 'pdfFiles'."}), 400
+
+    results, errors = extract_batch(uploads, tender=request.form.get('tender'))
+    return jsonify({
+        "tender": request.form.get('tender'),
+        "results": results,
+        "errors": errors
+    })
+
+# Queue an upload for background extraction and return its job id at once
+@bp.route('/jobs', methods=['POST'])
+def submit_job():
+    from jobs import QueueFull
+
+    pdf_file = request.files['pdfFile']
+    tender = request.form.get('tender')
+    try:
+        key = upload_key(pdf_file.stream)
+    except UploadTooLarge as e:
+        return jsonify({"error": str(e)}), 413
+
+    job_queue = services().job_queue
+    cached = services().extraction_cache.get(key)
+    try:
+        if cached is not None:
+            reuse_extraction(key, cached, filename=pdf_file.filename, tender=tender)
+            job_id = job_queue.complete(cached, key, filename=pdf_file.filename, tender=tender)
+        else:
+            job_id = job_queue.submit(pdf_file.stream, key, filename=pdf_file.filename, tender=tender)
+    except QueueFull as e:
+        return jsonify({"error": str(e)}), 503, {'Retry-After': '30'}
+
+    return jsonify({
+        "job_id": job_id,
+        "status_url": url_for('.job_status', job_id=job_id),
+        "events_url": url_for('.job_events', job_id=job_id)
+    }), 202
+
+@bp.route('/jobs/<job_id>')
+def job_status(job_id):
+    job = services().job_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job."}), 404
+    job.pop('key')
+    # An extracted job's result still holds its page text until it is done
+    if job['status'] != 'done':
+        job['result'] = None
+    return jsonify(job)
+
+# Server-sent events with the job's progress until it finishes
+@bp.route('/jobs/<job_id>/events')
+def job_events(job_id):
+    from jobs import TERMINAL_STATES
+
+    job_queue = services().job_queue
+    if job_queue.get(job_id) is None:
+        return jsonify({"error": "Unknown job."}), 404
+
+    def events():
+        last = None
+        while True:
+            job = job_queue.get(job_id)
+            state = (job['status'], job['pages_done'], job['pages_total'])
+            if state != last:
+                last = state
+                event = {"status": job['status'], "pages_done": job['pages_done'],
+                         "pages_total": job['pages_total']}
+                if job['status'] in TERMINAL_STATES:
+                    event.update(result=job['result'], error=job['error'])
+                yield f"data: {json.dumps(event)}\n\n"
+            if job['status'] in TERMINAL_STATES:
+                return
+            time.sleep(0.5)
+
+    return Response(stream_with_context(events()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache'})
+
+# Search the text of every indexed RFP, optionally within one tender
+@bp.route('/search')
+def search():
+    from text_index import InvalidQuery
+
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({"error": "Missing search query 'q'."}), 400
+    tender = request.args.get('tender')
+    try:
+        results = services().text_index.search(query, tender=tender,
+                                               limit=request.args.get('limit', 20, type=int))
+    except InvalidQuery as e:
+        return jsonify({"error": f"Invalid search query: {e}"}), 400
+    return jsonify({"query": query, "tender": tender, "results": results})
+
+@bp.route('/tenders')
+def list_tenders():
+    return jsonify({"tenders": services().storage.read_tenders()})
+
+# Create or update a tender from a JSON body with its "id" and any other fields
+@bp.route('/tenders', methods=['POST'])
+def create_tender():
+    data = request.get_json(silent=True) or {}
+    tender = data.get('id')
+    if not valid_tender(tender):
+        return jsonify({"error": "A tender needs a string 'id' without '/'."}), 400
+    services().storage.write_tender(tender, data)
+    return jsonify(services().storage.read_tender(tender)), 201
+
+# Split a tender document into requirement clauses and categorize them
+@bp.route('/tenders/<tender>/requirements', methods=['POST'])
+def upload_tender_requirements(tender):
+    from pdf_text import PageTextReader
+    from tender_requirements import tabulate
+
+    tender_file = request.files['tenderFile']
+    try:
+        upload_key(tender_file.stream)
+    except UploadTooLarge as e:
+        return jsonify({"error": str(e)}), 413
+
+    with span('pdf_parse'):
+        pages = list(PageTextReader(tender_file.stream))
+    with span('requirements_tabulate'):
+        requirements = tabulate(pages)
+    services().storage.write_requirements(tender, requirements)
+    categories = {}
+    for requirement in requirements:
+        categories[requirement["category"]] = categories.get(requirement["category"], 0) + 1
+    return jsonify({"tender": tender, "requirements": len(requirements), "categories": categories})
 
-@app.route('/fakedata')
+@bp.route('/tenders/<tender>/requirements')
+def tender_requirements(tender):
+    requirements = services().storage.read_requirements(tender)
+    category = request.args.get('category')
+    if category:
+        requirements = [requirement for requirement in requirements
+                        if requirement["category"] == category]
+    return jsonify({"tender": tender, "requirements": requirements})
+
+@bp.route('/tenders/<tender>/compliance')
+def tender_compliance_matrix(tender):
+    from tender_requirements import COMPLIANCE_THRESHOLD
+
+    requirements, vendors, coverage, summary = tender_compliance(tender)
+    return jsonify({
+        "tender": tender,
+        "threshold": COMPLIANCE_THRESHOLD,
+        "vendors": vendors,
+        "requirements": [requirement["id"] for requirement in requirements],
+        "coverage": coverage.round(4).tolist(),
+        "summary": summary
+    })
+
+# Requirements tabulated by category, with each vendor's compliance
+@bp.route('/tenders/<tender>')
+def tender_report(tender):
+    from tender_requirements import COMPLIANCE_THRESHOLD
+
+    requirements, vendors, coverage, summary = tender_compliance(tender)
+    categories = {}
+    for requirement, row in zip(requirements, coverage.T.tolist()):
+        categories.setdefault(requirement["category"], []).append(
+            (requirement, [share >= COMPLIANCE_THRESHOLD for share in row]))
+    return render_template('tender_requirements.html', tender=tender, vendors=vendors,
+                           categories=categories, summary=summary)
+
+@bp.before_app_request
+def start_request():
+    g.request_started = time.perf_counter()
+    config = current_app.config
+    if config['PROFILING_ENABLED'] and request.headers.get(config['PROFILE_HEADER']):
+        import cProfile
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is already active in this process
+            return
+        g.profiler = profiler
+
+# Every tender a request names, in the query string (?tender=) or an upload
+# form, is held to the same rule as the ids POST /tenders accepts
+@bp.before_request
+def check_tenders():
+    tenders = request.args.getlist('tender')
+    if request.method == 'POST':
+        tenders += request.form.getlist('tender')
+    for tender in tenders:
+        if not valid_tender(tender):
+            return jsonify({"error": f"Invalid tender {tender!r}: ids must be non-blank and "
+                                     f"without '/'."}), 400
+
+# Latency is measured to the response headers; a streamed body is not included
+@bp.after_app_request
+def finish_request(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        REQUEST_SECONDS.observe(time.perf_counter() - started,
+                                route=request.url_rule.rule if request.url_rule else 'unmatched',
+                                method=request.method, status=response.status_code)
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.disable()
+        response = profile_report(profiler, response)
+    return response
+
+# A request that raised never reaches finish_request
+@bp.teardown_app_request
+def stop_profiler(exc):
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.disable()
+
+@bp.route('/metrics')
+def prometheus_metrics():
+    if not current_app.config['METRICS_ENABLED']:
+        return jsonify({"error": "Metrics are disabled."}), 404
+    return Response(REGISTRY.render(cache_metrics(services())),
+                    mimetype='text/plain; version=0.0.4')
+
+@bp.app_errorhandler(413)
+def request_too_large(e):
+    limit = current_app.config['MAX_REQUEST_BYTES']
+    return jsonify({"error": f"Request exceeds the {limit} byte limit."}), 413
+
+@bp.route('/extract_cache/stats')
+def extract_cache_stats():
+    return jsonify(services().extraction_cache.stats())
+
+@bp.route('/finance_cache/invalidate', methods=['POST'])
+def invalidate_finance_cache():
+    for cache in services().all_finance_caches():
+        cache.invalidate()
+    return jsonify({"invalidated": True})
+
+# Vendor comparison with scores and ranks as CSV, XLSX or Parquet, streamed
+# as it is written. ?tender= may be repeated; without it every tender is
+# exported into one file.
+@bp.route('/export.<fmt>')
+def export_comparison(fmt):
+    from export import EXPORT_FORMATS, export_rows
+    from scoring import NORMALIZATIONS
+
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({"error": f"Unsupported export format: {fmt}"}), 404
+    method = request.args.get('method', 'minmax')
+    if method not in NORMALIZATIONS:
+        return jsonify({"error": f"Method must be one of {', '.join(NORMALIZATIONS)}."}), 400
+    tenders = (request.args.getlist('tender')
+               or [tender["id"] for tender in services().storage.read_tenders()])
+
+    name = re.sub(r'[^\w.-]', '_', tenders[0] if len(tenders) == 1 else 'tenders')
+    body = export_rows(fmt, comparison_batches(tenders, method,
+                                               current_app.config['EXPORT_BATCH_SIZE']))
+    return Response(stream_with_context(body), mimetype=EXPORT_FORMATS[fmt],
+                    headers={'Content-Disposition': f'attachment; filename="comparison-{name}.{fmt}"'})
+
+# Running finance statistics of one tender (?tender=) or of every tender,
+# read from the aggregates kept as records are written. Browsers get the
+# finance_stats.html page, other clients JSON.
+@bp.route('/stats')
+def finance_statistics():
+    from finance_stats import FinanceStats
+
+    tender = request.args.get('tender')
+    storage = services().storage
+    if tender is not None:
+        stats = {tender: storage.read_finance_stats(tender)}
+    else:
+        stats = storage.read_finance_stats()
+    summaries = {name: FinanceStats.from_dict(data).summary() for name, data in stats.items()}
+    if request.accept_mimetypes.best_match(['application/json', 'text/html']) == 'text/html':
+        return render_template('finance_stats.html', tenders=summaries)
+    return jsonify({"tenders": summaries})
+
+# Recompute a tender's statistics from its records
+@bp.route('/stats/rebuild', methods=['POST'])
+def rebuild_finance_statistics():
+    from finance_stats import FinanceStats
+
+    tender = request.args.get('tender')
+    if not tender:
+        return jsonify({"error": "Missing tender."}), 400
+    stats = services().storage.rebuild_finance_stats(tender)
+    return jsonify({"tenders": {tender: FinanceStats.from_dict(stats).summary()}})
+
+# Cursor-paginated finance records, e.g. /finance?tender=T-42&sort=Budget&order=desc
+@bp.route('/finance')
+def finance_listing():
+    from storage import InvalidCursor
+
+    try:
+        args = finance_page_args()
+        items, next_cursor = read_finance_page(args)
+    except InvalidCursor as e:
+        return jsonify({"error": f"Invalid cursor: {e}"}), 400
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({
+        "tender": args["tender"],
+        "sort": args["sort"],
+        "order": args["order"],
+        "records": [{"id": doc_id, **record} for doc_id, record in items],
+        "next_cursor": next_cursor,
+        "next_url": next_cursor and url_for('.finance_listing', **dict(args, cursor=next_cursor))
+    })
+
+# Finance views show one tender's vendors with ?tender=, otherwise every record.
+# The table takes the same parameters as /finance and is streamed a page at a time.
+@bp.route('/fakedata')
 def fakedata():
-    finance_data = retrieve_from_firebase()
-    html_content = create_html_table(finance_data)
-    publish_html(html_content)
-    print("HTML page published successfully!")
+    from storage import decode_cursor
 
-    return render_template('finance_data.html')
+    try:
+        args = finance_page_args()
+        # A bad cursor is rejected before the response starts streaming
+        if args["cursor"] is not None:
+            decode_cursor(args["cursor"], args["sort"], args["order"] == 'desc')
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return Response(create_html_table(args), mimetype='text/html')
 
-@app.route('/budgetbar')
+@bp.route('/budgetbar')
 def budgetbar():
-    finance_data = retrieve_from_firebase()
-    generate_budget_bar_graph(finance_data)
-    return render_template('budget_bar_graph.html')
+    from charts import chart_key
 
-@app.route('/rank')
+    tender = request.args.get('tender')
+    cache = services().finance_cache_for(tender)
+    version, _ = cache.snapshot()
+    key = chart_key('budget', *budget_series(cache.table()))
+    return services().render_cache.respond(('budgetbar', version, tender), lambda: render_template(
+        'budget_bar_graph.html', chart_url=url_for('.budget_chart', fmt='png', tender=tender, v=key)))
+
+# The chart URL carries its data key, so a matching request can be cached
+# by the browser indefinitely; anything else revalidates by ETag
+@bp.route('/charts/budget.<fmt>')
+def budget_chart(fmt):
+    from charts import CHART_FORMATS
+
+    if fmt not in CHART_FORMATS:
+        return jsonify({"error": f"Unsupported chart format: {fmt}"}), 404
+    table = services().finance_cache_for(request.args.get('tender')).table()
+    key, body = generate_budget_bar_graph(table, fmt=fmt)
+
+    response = Response(body, mimetype=CHART_FORMATS[fmt])
+    response.set_etag(key)
+    if request.args.get('v') == key:
+        response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    else:
+        response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
+# Recommended vendors with justifications, e.g.
+# /recommend?tender=T-42&method=weighted&top=5&weight.IRR=0.5. Dominated bids
+# are pruned before ranking; every criterion extract_info() reports is scored.
+# Browsers get a table, other clients JSON.
+@bp.route('/recommend')
+def recommend_vendors():
+    from recommendation import RECOMMENDATION_METHODS, RECOMMENDATION_WEIGHTS, recommend
+
+    tender = request.args.get('tender')
+    method = request.args.get('method', 'topsis')
+    if method not in RECOMMENDATION_METHODS:
+        return jsonify({"error": f"Method must be one of {', '.join(RECOMMENDATION_METHODS)}."}), 400
+    try:
+        top = int(request.args.get('top', 3))
+        if top < 1:
+            raise ValueError
+    except ValueError:
+        return jsonify({"error": "top must be a positive integer."}), 400
+    try:
+        weights = recommendation_weights(request.args)
+        frame = retrieve_finance_frame(tender, RECOMMENDATION_WEIGHTS, complete=False)
+        with span('recommendation'):
+            recommendations = recommend(frame, weights, method, top)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if request.accept_mimetypes.best_match(['application/json', 'text/html']) == 'text/html':
+        return render_template('recommendations.html', tender=tender, method=method,
+                               weights=weights, recommendations=recommendations)
+    return jsonify({"tender": tender, "method": method, "weights": weights,
+                    "recommendations": recommendations})
+
+@bp.route('/rank')
 def rank():
-  screened_ideas = screen_ideas(None)  
-  html_table = generate_html_table(screened_ideas, top_ranks=3)
-  return render_template('screened_ideas.html')
+  tender = request.args.get('tender')
+  method = request.args.get('method', 'minmax')
+  version, _ = scoring_cache(tender).snapshot()
+  if method == 'minmax':
+      def render():
+          with span('scoring'):
+              top = display_rows(ranking_index_for(tender), 3)
+          return generate_html_table(top, top_ranks=3)
+  else:
+      render = lambda: generate_html_table(
+          screen_ideas(None, tender=tender, method=method, top_ranks=3), top_ranks=3)
+  return services().render_cache.respond(('rank', version, tender, method), render)
+
+# Application factory; `config` overrides values read from the environment.
+# Serve with e.g. `gunicorn "main:create_app()"`.
+def create_app(config=None):
+    app = Flask(__name__)
+    app.request_class = UploadRequest
+    app.config.update(load_config())
+    app.config.update(config or {})
+    app.config['MAX_CONTENT_LENGTH'] = app.config['MAX_REQUEST_BYTES']
+    app.extensions['tendoreasy'] = Services(app)
+    app.register_blueprint(bp)
+    if app.config['JOB_WORKERS']:
+        # Starting the runner also resumes jobs queued before a restart
+        app.extensions['tendoreasy'].job_queue.start()
+    return app
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=80)
\ No newline at end of file
+    create_app().run(host='0.0.0.0', port=80)
@@ -0,0 +1,138 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Latency buckets in seconds
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels[label]) for label in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{_labels(zip(self.labels, key))} {_number(value)}')
+        return lines
+
+
+class Histogram:
+    # Cumulative-bucket histogram in the Prometheus exposition format
+    def __init__(self, name, help, labels=(), buckets=BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels[label]) for label in self.labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._series.items()):
+                pairs = list(zip(self.labels, key))
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                    cumulative += bucket_count
+                    le = '+Inf' if bound == float('inf') else _number(bound)
+                    lines.append(f'{self.name}_bucket{_labels(pairs + [("le", le)])} {cumulative}')
+                lines.append(f'{self.name}_sum{_labels(pairs)} {_number(total)}')
+                lines.append(f'{self.name}_count{_labels(pairs)} {count}')
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def counter(self, name, help, labels=()):
+        metric = Counter(name, help, labels)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help, labels=(), buckets=BUCKETS):
+        metric = Histogram(name, help, labels, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    # Prometheus text exposition of every metric, followed by `extra`
+    # (name, type, help, [(labels dict, value)]) families computed at scrape
+    # time, e.g. cache statistics read from live objects
+    def render(self, extra=()):
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        for name, kind, help, samples in extra:
+            lines.extend([f'# HELP {name} {help}', f'# TYPE {name} {kind}'])
+            lines.extend(f'{name}{_labels(sorted(labels.items()))} {_number(value)}'
+                         for labels, value in samples)
+        return '\n'.join(lines) + '\n'
+
+
+def _labels(pairs):
+    pairs = list(pairs)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+               for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def _number(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+REGISTRY = Registry()
+REQUEST_SECONDS = REGISTRY.histogram(
+    'tendoreasy_request_duration_seconds', 'Time to build each response, by route.',
+    labels=('route', 'method', 'status'))
+SPAN_SECONDS = REGISTRY.histogram(
+    'tendoreasy_span_duration_seconds',
+    'Time spent in instrumented steps (PDF parse, field extraction, storage calls, scoring, '
+    'chart render).', labels=('span',))
+STORAGE_READS = REGISTRY.counter(
+    'tendoreasy_storage_reads_total', 'Documents read from storage.',
+    labels=('backend', 'method'))
+STORAGE_WRITES = REGISTRY.counter(
+    'tendoreasy_storage_writes_total', 'Documents written to storage.',
+    labels=('backend', 'method'))
+
+
+@contextmanager
+def span(name):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        SPAN_SECONDS.observe(time.perf_counter() - started, span=name)
+
+
+# Record {span: seconds} timings measured elsewhere, e.g. in a worker process
+def record_spans(timings):
+    for name, seconds in timings.items():
+        SPAN_SECONDS.observe(seconds, span=name)
@@ -0,0 +1,166 @@
+import re
+
+from pdfreader import PDFDocument
+from pdfreader.types.native import IndirectReference, Stream
+from pdfreader.types.objects import Form, Page, PageTreeNode, StreamBasedObject
+from pdfreader.viewer import GraphicsStateStack, Resources
+from pdfreader.viewer.pdfviewer import ContextualViewer
+from pdfreader.viewer.simple import TextOperatorsMixin
+
+# Form XObjects may draw other forms; deeper nesting is ignored
+MAX_FORM_DEPTH = 8
+
+# An XObject's dictionary is read from this many bytes at its offset to learn
+# its /Subtype without parsing the stream data behind it
+XOBJECT_PEEK_BYTES = 2048
+SUBTYPE_PATTERN = re.compile(rb'/Subtype\s*/(\w+)')
+
+
+class PageTextViewer(TextOperatorsMixin, ContextualViewer):
+    # Interprets one content stream for its text only. SimplePDFViewer also
+    # serializes every operator into canvas.text_content and keeps inline
+    # images and image XObjects on a canvas cached per page; here those are
+    # dropped as soon as they are parsed and image data is never read.
+    def __init__(self, stream, resources, gss, reader, page, depth=0):
+        self.reader = reader
+        self.page = page
+        self.depth = depth
+        self.forms_drawn = set()
+        super().__init__(stream, resources, gss)
+
+    def after_handler(self, obj):
+        pass
+
+    # Strings drawn on different lines are separated by a newline so words at
+    # line ends do not run together; pieces of one line are still joined as is
+    def _break_line(self):
+        if self.canvas.strings and self.canvas.strings[-1] != '\n':
+            self.canvas.strings.append('\n')
+
+    def on_Td(self, op):
+        if op.args[1] != 0:
+            self._break_line()
+
+    on_TD = on_Td
+
+    def on_Tstar(self, op):
+        self._break_line()
+
+    def on_apostrophe(self, op):
+        self._break_line()
+        self.on_Tj(op)
+
+    def on_ET(self, op):
+        super().on_ET(op)
+        self._break_line()
+
+    def on_inline_image(self, obj):
+        pass
+
+    def on_Do(self, op):
+        name = op.args[0]
+        if name in self.forms_drawn or self.depth >= MAX_FORM_DEPTH:
+            return
+        xobj = self.reader.form(self.resources.XObject.get(name))
+        # Text can sit inside form XObjects; images carry none
+        if xobj is not None:
+            self.forms_drawn.add(name)
+            resources = self.reader.resources(self.page, [xobj.Resources] if xobj.Resources else [])
+            form = PageTextViewer(xobj.filtered, resources, self.gss, self.reader, self.page,
+                                  self.depth + 1)
+            form.render()
+            self.canvas.strings.extend(form.canvas.strings)
+
+
+def _releasable(value):
+    return isinstance(value, Stream) or (isinstance(value, dict) and value.get('Type') == 'Page')
+
+
+class PageTextReader:
+    # Yields the text of one page at a time from a single PDFDocument,
+    # walking the page tree once. Only the current page is held in memory,
+    # so peak usage stays flat however long the document is. (PDFDocument's
+    # own pages() resolves a node's whole Kids array before the first page.)
+    def __init__(self, file):
+        self.file = file
+        self.doc = PDFDocument(file)
+
+    @property
+    def page_count(self):
+        return self.doc.root.Pages.Count
+
+    def __iter__(self):
+        for page in self._pages(self.doc.root.Pages):
+            text = self.page_text(page)
+            self._release_parsed()
+            yield text
+
+    # Page tree walk that resolves one kid at a time
+    def _pages(self, node):
+        kids = dict.get(node, 'Kids') or []
+        if isinstance(kids, IndirectReference):
+            kids = self.doc.locate_object(kids.num, kids.gen) or []
+        for kid in kids:
+            child = self.doc.build(kid, lazy=True)
+            if isinstance(child, Page):
+                yield child
+            elif isinstance(child, PageTreeNode):
+                yield from self._pages(child)
+
+    def page_text(self, page):
+        if page.Contents is None:
+            return ''
+        if isinstance(page.Contents, StreamBasedObject):
+            stream = page.Contents.filtered
+        else:
+            stream = b''.join(content.filtered for content in page.Contents)
+        viewer = PageTextViewer(stream, self.resources(page), GraphicsStateStack(), self, page)
+        viewer.render()
+        return ''.join(viewer.canvas.strings)
+
+    # Same inheritance as Resources.from_page, except XObject entries are
+    # kept as unresolved references so images are not parsed up front
+    def resources(self, page, stack=None):
+        stack = list(stack or [])
+        node = page
+        while node:
+            if node.Resources:
+                stack.append(node.Resources)
+            node = node.Parent
+
+        merged = {}
+        for resources in reversed(stack):
+            for entry in resources:
+                value = resources[entry]
+                if isinstance(value, dict):
+                    items = dict.items(value) if entry == 'XObject' else value.items()
+                    merged.setdefault(entry, {}).update(items)
+        return Resources(**merged)
+
+    # Resolve an XObject reference if it is a form; images are skipped
+    # after peeking at their dictionary
+    def form(self, ref):
+        if isinstance(ref, IndirectReference):
+            if self._subtype(ref) == 'Image':
+                return None
+            ref = self.doc.build(ref, lazy=True)
+        return ref if isinstance(ref, Form) else None
+
+    def _subtype(self, ref):
+        for xref in self.doc.parser.trailer.xrefs:
+            entry = xref.in_use.get(ref.num)
+            if entry is not None and entry.generation == ref.gen:
+                self.file.seek(entry.offset)
+                header = self.file.read(XOBJECT_PEEK_BYTES).split(b'stream', 1)[0]
+                match = SUBTYPE_PATTERN.search(header)
+                return match.group(1).decode('latin-1') if match else None
+        # Objects packed in object streams are resolved normally
+        return None
+
+    # Forget parsed pages and streams (contents, forms, fonts). The document
+    # registry otherwise keeps every object it has parsed, so memory would
+    # grow with each page; anything needed again is re-read from the file.
+    def _release_parsed(self):
+        known = self.doc.registry.known_indirect_objects
+        for key in [key for key, value in known.items() if _releasable(value)]:
+            del known[key]
@@ -0,0 +1,171 @@
+import bisect
+import threading
+
+import numpy as np
+
+from scoring import COST_CRITERIA, DEFAULT_WEIGHTS
+
+
+class RankingIndex:
+    # Ranking of finance records under min-max normalized weighted scoring,
+    # kept up to date one change at a time. Raw criterion values live in a
+    # growable NumPy matrix; `_order` is a sorted list of (-score, doc_id).
+    #
+    # While a change stays inside the current per-criterion bounds, only the
+    # changed record is rescored and moved with a binary search. A change that
+    # widens or may narrow a bound shifts every score, so the index is marked
+    # dirty and rescored in one vectorized pass on the next read. Bound shifts
+    # become rare as history grows, so most submissions take the cheap path.
+    def __init__(self, weights=DEFAULT_WEIGHTS, tender=None):
+        self.criteria = list(weights)
+        self.tender = tender
+        self._weights = np.array([weights[criterion] for criterion in self.criteria])
+        self._cost = np.array([criterion in COST_CRITERIA for criterion in self.criteria])
+        self._lock = threading.Lock()
+        self.reset([])
+
+    def reset(self, items):
+        with self._lock:
+            self._ids = []
+            self._names = []
+            self._rows = {}
+            self._values = np.empty((max(16, len(items)), len(self.criteria)))
+            self._scores = {}
+            self._order = []
+            self._low = np.full(len(self.criteria), np.inf)
+            self._high = np.full(len(self.criteria), -np.inf)
+            for doc_id, record in items:
+                parsed = self._parse(record)
+                if parsed is not None:
+                    self._store(doc_id, *parsed)
+            self._dirty = True
+
+    # Apply ('added' | 'modified' | 'removed', doc_id, record) changes
+    def apply(self, changes):
+        with self._lock:
+            for kind, doc_id, record in changes:
+                parsed = None if kind == 'removed' else self._parse(record)
+                if parsed is None:
+                    self._remove(doc_id)
+                else:
+                    self._upsert(doc_id, *parsed)
+
+    # FinanceCache subscriber: a full reload (changes is None) resets the
+    # index, watcher deliveries are applied one change at a time
+    def follow(self, items, changes):
+        if changes is None:
+            self.reset(items)
+        else:
+            self.apply(changes)
+
+    # Best k entries as (score, *criterion values, name) tuples
+    def top(self, k=None):
+        with self._lock:
+            if self._dirty:
+                self._rescore()
+            entries = self._order if k is None else self._order[:k]
+            result = []
+            for negative_score, doc_id in entries:
+                row = self._rows[doc_id]
+                values = [_number(value) for value in self._values[row].tolist()]
+                result.append((-negative_score, *values, self._names[row]))
+            return result
+
+    def __len__(self):
+        return len(self._ids)
+
+    def _parse(self, record):
+        if self.tender is not None and record.get('tender') != self.tender:
+            return None
+        name = record.get('Name')
+        try:
+            values = np.array([float(record[criterion]) for criterion in self.criteria])
+        except (KeyError, TypeError, ValueError):
+            return None
+        if name is None or np.isnan(values).any():
+            return None
+        return name, values
+
+    def _store(self, doc_id, name, values):
+        row = self._rows.get(doc_id)
+        if row is None:
+            row = len(self._ids)
+            if row == len(self._values):
+                self._values = np.concatenate([self._values, np.empty_like(self._values)])
+            self._rows[doc_id] = row
+            self._ids.append(doc_id)
+            self._names.append(name)
+        else:
+            self._names[row] = name
+        self._values[row] = values
+
+    def _upsert(self, doc_id, name, values):
+        row = self._rows.get(doc_id)
+        # A change delivered twice (applied at write time, then by the
+        # watcher) leaves the index as it is
+        if row is not None and self._names[row] == name and (self._values[row] == values).all():
+            return
+        if row is not None:
+            self._unlink(doc_id)
+            if self._on_bound(self._values[row]):
+                self._dirty = True
+        self._store(doc_id, name, values)
+        if (values < self._low).any() or (values > self._high).any():
+            self._dirty = True
+        if not self._dirty:
+            self._link(doc_id, self._score(values[np.newaxis, :])[0])
+
+    def _remove(self, doc_id):
+        row = self._rows.pop(doc_id, None)
+        if row is None:
+            return
+        self._unlink(doc_id)
+        if self._on_bound(self._values[row]):
+            self._dirty = True
+
+        # Move the last row into the freed slot to keep the matrix dense
+        last = len(self._ids) - 1
+        if row != last:
+            moved = self._ids[last]
+            self._ids[row] = moved
+            self._names[row] = self._names[last]
+            self._values[row] = self._values[last]
+            self._rows[moved] = row
+        self._ids.pop()
+        self._names.pop()
+
+    def _link(self, doc_id, score):
+        self._scores[doc_id] = score
+        bisect.insort(self._order, (-score, doc_id))
+
+    def _unlink(self, doc_id):
+        score = self._scores.pop(doc_id, None)
+        if score is None or self._dirty:
+            return
+        position = bisect.bisect_left(self._order, (-score, doc_id))
+        del self._order[position]
+
+    def _on_bound(self, values):
+        return self._dirty or (values == self._low).any() or (values == self._high).any()
+
+    def _score(self, matrix):
+        span = self._high - self._low
+        normalized = (matrix - self._low) / np.where(span == 0, 1, span)
+        normalized[:, self._cost] = 1 - normalized[:, self._cost]
+        return normalized @ self._weights
+
+    def _rescore(self):
+        matrix = self._values[:len(self._ids)]
+        if len(matrix):
+            self._low = matrix.min(axis=0)
+            self._high = matrix.max(axis=0)
+            scores = self._score(matrix).tolist()
+        else:
+            scores = []
+        self._scores = dict(zip(self._ids, scores))
+        self._order = sorted(zip([-score for score in scores], self._ids))
+        self._dirty = False
+
+
+def _number(value):
+    return int(value) if value.is_integer() else value
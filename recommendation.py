@@ -0,0 +1,173 @@
+import numpy as np
+
+from scoring import COST_CRITERIA, normalize, top_k
+
+# Every criterion extract_info() reports, weighted for recommendations
+RECOMMENDATION_WEIGHTS = {
+    'Budget': 0.25,
+    'NPV': 0.25,
+    'IRR': 0.2,
+    'Time taken': 0.15,
+    'Number of Previous works': 0.15
+}
+RECOMMENDATION_METHODS = ('topsis', 'weighted')
+
+
+# Mask of the rows no other row dominates. A row dominates another when it is
+# at least as good on every column and better on one; `cost` marks columns
+# where lower is better. Each pass keeps only the candidates that beat the
+# current one somewhere (or tie it everywhere), so the work is proportional
+# to rows times front size rather than rows squared.
+def pareto_front(matrix, cost):
+    points = np.where(cost, -matrix, matrix)
+    candidates = np.arange(len(points))
+    position = 0
+    while position < len(candidates):
+        current = points[candidates[position]]
+        remaining = points[candidates]
+        keep = (remaining > current).any(axis=1) | (remaining == current).all(axis=1)
+        candidates = candidates[keep]
+        position = keep[:position].sum() + 1
+    mask = np.zeros(len(points), dtype=bool)
+    mask[candidates] = True
+    return mask
+
+
+# Pareto front number of each row (1 for the non-dominated rows, 2 for those
+# only dominated by front 1, ...), peeling fronts until at least `needed`
+# rows are assigned; rows beyond that are left at 0
+def pareto_fronts(matrix, cost, needed=None):
+    fronts = np.zeros(len(matrix), dtype=int)
+    remaining = np.arange(len(matrix))
+    front = 0
+    while remaining.size and (needed is None or front == 0 or (fronts > 0).sum() < needed):
+        front += 1
+        mask = pareto_front(matrix[remaining], cost)
+        fronts[remaining[mask]] = front
+        remaining = remaining[~mask]
+    return fronts
+
+
+# Relative closeness to the ideal bid (TOPSIS): columns are vector
+# normalized and weighted, then each row scores d- / (d+ + d-) from its
+# distances to the best and worst value of every column
+def topsis_scores(matrix, weights, cost):
+    norms = np.linalg.norm(matrix, axis=0)
+    weighted = matrix / np.where(norms == 0, 1, norms) * weights
+    best = np.where(cost, weighted.min(axis=0), weighted.max(axis=0))
+    worst = np.where(cost, weighted.max(axis=0), weighted.min(axis=0))
+    to_best = np.linalg.norm(weighted - best, axis=1)
+    to_worst = np.linalg.norm(weighted - worst, axis=1)
+    total = to_best + to_worst
+    return np.where(total == 0, 1.0, to_worst / np.where(total == 0, 1, total))
+
+
+# Weighted share each criterion earns: the weight times how far the value
+# sits from the worst to the best among the rows (0 to 1). A criterion every
+# row ties on sets no row apart and earns half its weight. For the weighted
+# method a row's contributions sum to its score.
+def contributions(matrix, weights, cost):
+    normalized = normalize(matrix, 'minmax')
+    normalized[:, cost] = 1 - normalized[:, cost]
+    normalized[:, tied_columns(matrix)] = 0.5
+    return normalized * weights
+
+
+# Mask of the columns where every row has the same value
+def tied_columns(matrix):
+    return (matrix == matrix[:1]).all(axis=0)
+
+
+# Top `top` vendors of a finance frame: dominated bids are pruned by Pareto
+# fronts (falling back to later fronts when the first is smaller than `top`)
+# and the shortlist is ranked by front, then by TOPSIS closeness or weighted
+# score. A bid missing a weighted criterion is scored on the worst value
+# any bid gives for it. Returns dicts with the vendor's values (None where
+# missing), the criteria it is missing, score, front, contribution of each
+# criterion and a one-line justification.
+def recommend(frame, weights=RECOMMENDATION_WEIGHTS, method='topsis', top=3):
+    if method not in RECOMMENDATION_METHODS:
+        raise ValueError(f"Unknown recommendation method: {method}")
+    criteria = [criterion for criterion, weight in weights.items() if weight > 0]
+    if not criteria:
+        raise ValueError("At least one criterion needs a positive weight.")
+    if frame.empty:
+        return []
+    total = sum(weights[criterion] for criterion in criteria)
+    weight = np.array([weights[criterion] / total for criterion in criteria])
+    cost = np.array([criterion in COST_CRITERIA for criterion in criteria])
+    matrix, missing = fill_worst(frame[criteria].to_numpy(dtype=float), cost)
+
+    fronts = pareto_fronts(matrix, cost, needed=top)
+    shortlist = np.flatnonzero(fronts)
+    values = matrix[shortlist]
+    shares = contributions(values, weight, cost)
+    tied = tied_columns(values)
+    if method == 'topsis':
+        scores = topsis_scores(values, weight, cost)
+    else:
+        scores = shares.sum(axis=1)
+    # Front first, then score: offsetting by front keeps later fronts below
+    order = top_k(scores - fronts[shortlist] * 2, top)
+
+    names = frame['Name'].to_numpy()
+    recommendations = []
+    for position in order.tolist():
+        row = shortlist[position]
+        absent = [criterion for criterion, gap in zip(criteria, missing[row]) if gap]
+        recommendations.append({
+            "name": names[row],
+            "score": float(scores[position]),
+            "front": int(fronts[row]),
+            "values": {criterion: None if gap else _number(value)
+                       for criterion, value, gap in zip(criteria, matrix[row].tolist(),
+                                                        missing[row])},
+            "missing": absent,
+            "contributions": {criterion: float(share)
+                              for criterion, share in zip(criteria, shares[position])},
+            "justification": justify(criteria, weight, shares[position], int(fronts[row]),
+                                     len(matrix), tied, absent)
+        })
+    return recommendations
+
+
+# Plain-language reason for a recommendation: where the bid stands on the
+# Pareto fronts and which weighted criteria carry or hold back its score.
+# Criteria the shortlisted bids all tie on (`tied`) are neither, and the
+# criteria the bid did not give (`missing`) are named.
+def justify(criteria, weight, shares, front, bids, tied=None, missing=()):
+    achieved = shares / weight
+    ranked = [i for i in np.argsort(-shares, kind='stable') if tied is None or not tied[i]]
+    strengths = [criteria[i] for i in ranked[:2] if achieved[i] >= 0.5]
+    weaknesses = [criteria[i] for i in ranked[::-1] if achieved[i] < 0.25]
+    if front == 1:
+        parts = [f"Pareto-optimal: none of the {bids} bids beats it on one criterion "
+                 f"without losing on another"]
+    else:
+        parts = [f"Dominated only by bids on Pareto fronts before front {front}"]
+    if strengths:
+        parts.append("strongest on " + " and ".join(strengths))
+    if weaknesses:
+        parts.append("weakest on " + weaknesses[0])
+    if missing:
+        parts.append("no " + " or ".join(missing) + " given, scored as the worst bid")
+    return "; ".join(parts) + "."
+
+
+# Missing values (NaN) replaced by the worst value in their column, lowest
+# or, for `cost` columns, highest; a column with no values at all becomes 0.
+# Returns the filled matrix and the mask of what was missing.
+def fill_worst(matrix, cost):
+    missing = np.isnan(matrix)
+    observed = ~missing.all(axis=0)
+    worst = np.zeros(matrix.shape[1])
+    if observed.any():
+        values = matrix[:, observed]
+        worst[observed] = np.where(cost[observed], np.nanmax(values, axis=0),
+                                   np.nanmin(values, axis=0))
+    return np.where(missing, worst, matrix), missing
+
+
+def _number(value):
+    return int(value) if value.is_integer() else value
+
@@ -0,0 +1,47 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+from flask import make_response, request
+
+
+class RenderCache:
+    # Rendered pages keyed by view name and the version of the data they were
+    # built from. Each entry keeps a content hash used as the page's ETag, so
+    # repeat visits with unchanged data are answered with 304 Not Modified.
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    # Return the (body, etag) for key, calling render() on a miss
+    def get_or_render(self, key, render):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        body = render()
+        entry = (body, hashlib.sha1(body.encode('utf-8')).hexdigest())
+        with self._lock:
+            self._entries[key] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    # Conditional response for the current request
+    def respond(self, key, render):
+        body, etag = self.get_or_render(key, render)
+        response = make_response(body)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response.make_conditional(request)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
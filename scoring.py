@@ -0,0 +1,65 @@
+import json
+import os
+
+import numpy as np
+
+from finance_records import FinanceTable
+
+DEFAULT_WEIGHTS = {'Budget': 0.3, 'NPV': 0.4, 'IRR': 0.3}
+# Criteria where a lower value is better
+COST_CRITERIA = {'Budget', 'Time taken'}
+NORMALIZATIONS = ('minmax', 'zscore')
+
+
+# Build a columnar frame of vendor names and numeric criteria; records with a
+# missing or non-numeric value are dropped unless `complete` is False, which
+# keeps them with NaN in place of the value
+def finance_frame(records, criteria=tuple(DEFAULT_WEIGHTS), complete=True):
+    table = FinanceTable.from_items([(None, record) for record in records], criteria)
+    return table.frame(criteria, complete)
+
+
+# Scale each column to a comparable range; constant columns become zero
+def normalize(matrix, method='minmax'):
+    if method == 'minmax':
+        low = matrix.min(axis=0)
+        span = matrix.max(axis=0) - low
+        return (matrix - low) / np.where(span == 0, 1, span)
+    if method == 'zscore':
+        std = matrix.std(axis=0)
+        return (matrix - matrix.mean(axis=0)) / np.where(std == 0, 1, std)
+    raise ValueError(f"Unknown normalization: {method}")
+
+
+# Weighted sum of normalized criteria, with cost criteria inverted so that
+# cheaper always scores higher
+def score_frame(frame, weights=DEFAULT_WEIGHTS, method='minmax'):
+    criteria = list(weights)
+    if frame.empty:
+        return np.empty(0)
+    normalized = normalize(frame[criteria].to_numpy(dtype=float), method)
+    cost = np.array([criterion in COST_CRITERIA for criterion in criteria])
+    if method == 'minmax':
+        normalized[:, cost] = 1 - normalized[:, cost]
+    else:
+        normalized[:, cost] = -normalized[:, cost]
+    return normalized @ np.array([weights[criterion] for criterion in criteria])
+
+
+# Indices of the k best scores in descending order, using partial selection
+# so only the selected k are sorted
+def top_k(scores, k=None):
+    if k is None or k >= len(scores):
+        return np.argsort(-scores, kind='stable')
+    if k <= 0:
+        return np.empty(0, dtype=int)
+    selected = np.argpartition(-scores, k - 1)[:k]
+    return selected[np.argsort(-scores[selected], kind='stable')]
+
+
+# Per-tender weight overrides, read from a JSON file of {tender: {criterion: weight}}
+def load_tender_weights(path):
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
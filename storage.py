@@ -0,0 +1,676 @@
+import base64
+import inspect
+import json
+import os
+import sqlite3
+import threading
+
+from finance_stats import FinanceStats
+from metrics import STORAGE_READS, STORAGE_WRITES, span
+
+FIRESTORE_BATCH_LIMIT = 500
+# Finance fields a listing can be ordered by; each has a per-tender index
+FINANCE_SORT_FIELDS = ('Name', 'Budget', 'NPV', 'IRR', 'Vagueness')
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class Storage:
+    # Interface shared by the storage backends. Finance records are plain
+    # dicts as stored in the `finance` collection, each tagged with the id of
+    # its tender; rankings are lists of dicts with score, budget, npv, irr and
+    # name in rank order, published per tender. Finance reads and watches take
+    # a tender to filter on (None for every record) and reads an optional list
+    # of fields to project.
+
+    def read_finance(self, tender=None, fields=None):
+        return [record for _, record in self.read_finance_items(tender, fields)]
+
+    # (doc_id, record) pairs for the finance records of a tender
+    def read_finance_items(self, tender=None, fields=None):
+        raise NotImplementedError
+
+    # Call callback(items, changes) whenever the tender's finance data
+    # changes, where items is the full list of (doc_id, record) pairs and
+    # changes lists the ('added' | 'modified' | 'removed', doc_id, record)
+    # entries that caused it; returns an object with unsubscribe(). Watchers
+    # that can miss changes (e.g. those made by another process) also have
+    # stale(), which is true once such a change may have happened.
+    def watch_finance(self, callback, tender=None):
+        raise NotImplementedError
+
+    # One page of finance records ordered by `sort` (then document id),
+    # continuing after `cursor`. Returns (items, next_cursor), next_cursor
+    # being None on the last page; records without the sort field are left
+    # out. Cursors are opaque strings tied to the sort they were issued for.
+    def read_finance_page(self, tender=None, sort='Name', descending=False, limit=50,
+                          cursor=None):
+        raise NotImplementedError
+
+    # Records written with a tender also register it as a tender and update
+    # its running statistics in the same transaction
+    def write_finance(self, doc_id, record, tender=None):
+        raise NotImplementedError
+
+    # A tender's running finance statistics (FinanceStats.to_dict() data, or
+    # None before its first record); with no tender, every tender's keyed by id
+    def read_finance_stats(self, tender=None):
+        raise NotImplementedError
+
+    def write_finance_stats(self, tender, stats):
+        raise NotImplementedError
+
+    # Recompute a tender's statistics from its records, e.g. for records
+    # written before statistics were kept
+    def rebuild_finance_stats(self, tender):
+        stats = FinanceStats()
+        for record in self.read_finance(tender):
+            stats.update(None, record)
+        self.write_finance_stats(tender, stats.to_dict())
+        return stats.to_dict()
+
+    # Publish a tender's rankings (None for the ranking of every record). When
+    # the previously published rankings are given only positions that differ
+    # are written; returns the number of commits.
+    def write_rankings(self, rankings, previous=None, tender=None):
+        raise NotImplementedError
+
+    def read_rankings(self, tender=None):
+        raise NotImplementedError
+
+    # Create or update a tender; `data` fields are merged into its document
+    def write_tender(self, tender, data=None):
+        raise NotImplementedError
+
+    # Tender documents (dicts with their id), ordered by id
+    def read_tenders(self):
+        raise NotImplementedError
+
+    def read_tender(self, tender):
+        raise NotImplementedError
+
+    # Results are stored with their filename and tender alongside
+    def save_extraction(self, key, result, filename=None, tender=None):
+        raise NotImplementedError
+
+    def get_extraction(self, key):
+        raise NotImplementedError
+
+    # Replace a tender's tabulated requirements (dicts with id, category,
+    # confidence, text and terms, in document order)
+    def write_requirements(self, tender, requirements):
+        raise NotImplementedError
+
+    def read_requirements(self, tender):
+        raise NotImplementedError
+
+
+class FirestoreStorage(Storage):
+    def __init__(self, credentials_path):
+        import firebase_admin
+        from firebase_admin import credentials, firestore
+
+        if not firebase_admin._apps:
+            firebase_admin.initialize_app(credentials.Certificate(credentials_path))
+        self.db = firestore.client()
+        # Tenders known to have a document, so records do not rewrite it
+        self._tenders_seen = set()
+
+    # Per-tender reads are ordered by vendor name, which is served by the
+    # (tender, Name) composite index in firestore.indexes.json
+    def _finance_query(self, tender=None):
+        query = self.db.collection('finance')
+        if tender is not None:
+            query = query.where('tender', '==', tender).order_by('Name')
+        return query
+
+    # Field names with spaces ("Time taken") must be quoted as field paths
+    def read_finance_items(self, tender=None, fields=None):
+        query = self._finance_query(tender)
+        if fields:
+            query = query.select([self.db.field_path(field) for field in fields])
+        return [(doc.id, doc.to_dict()) for doc in query.stream()]
+
+    # Keyset pagination with start_after on (sort field, document id)
+    def read_finance_page(self, tender=None, sort='Name', descending=False, limit=50,
+                          cursor=None):
+        _check_sort(sort)
+        direction = 'DESCENDING' if descending else 'ASCENDING'
+        query = self.db.collection('finance')
+        if tender is not None:
+            query = query.where('tender', '==', tender)
+        query = query.order_by(sort, direction=direction).order_by('__name__', direction=direction)
+        if cursor is not None:
+            value, doc_id = decode_cursor(cursor, sort, descending)
+            query = query.start_after(
+                {sort: value, '__name__': self.db.collection('finance').document(doc_id)})
+        docs = list(query.limit(limit + 1).stream())
+        items = [(doc.id, doc.to_dict()) for doc in docs[:limit]]
+        return items, _next_cursor(items, len(docs) > limit, sort, descending)
+
+    # Listeners cannot take a projection, so watches deliver whole records
+    def watch_finance(self, callback, tender=None):
+        def on_snapshot(docs, changes, read_time):
+            callback([(doc.id, doc.to_dict()) for doc in docs],
+                     [(change.type.name.lower(), change.document.id, change.document.to_dict())
+                      for change in changes])
+        return self._finance_query(tender).on_snapshot(on_snapshot)
+
+    # The record and its tender's statistics are written in one transaction,
+    # which also reads the record being replaced so its values are taken out
+    def write_finance(self, doc_id, record, tender=None):
+        from firebase_admin import firestore
+
+        finance_ref = self.db.collection('finance').document(doc_id)
+        if tender is None:
+            finance_ref.set(record)
+            return
+        data = dict(record, tender=tender)
+        stats_ref = self._stats_ref(tender)
+        tender_operations = self._tender_operations(tender)
+
+        @firestore.transactional
+        def write(transaction):
+            old = finance_ref.get(transaction=transaction)
+            stats_snapshot = stats_ref.get(transaction=transaction)
+            stats = FinanceStats.from_dict(stats_snapshot.to_dict() if stats_snapshot.exists else None)
+            stats.update(old.to_dict() if old.exists and old.get('tender') == tender else None, data)
+            transaction.set(finance_ref, data)
+            transaction.set(stats_ref, stats.to_dict())
+            for _, doc_ref, fields in tender_operations:
+                transaction.set(doc_ref, fields, merge=True)
+
+        write(self.db.transaction())
+        self._tenders_seen.add(tender)
+
+    def _stats_ref(self, tender):
+        return self.db.collection('tenders').document(tender).collection('stats').document('finance')
+
+    def read_finance_stats(self, tender=None):
+        if tender is not None:
+            snapshot = self._stats_ref(tender).get()
+            return snapshot.to_dict() if snapshot.exists else None
+        return {doc.reference.parent.parent.id: doc.to_dict()
+                for doc in self.db.collection_group('stats').stream() if doc.id == 'finance'}
+
+    def write_finance_stats(self, tender, stats):
+        self._stats_ref(tender).set(stats)
+
+    # Operation creating a tender's document with its first write, unless
+    # this process has already seen one
+    def _tender_operations(self, tender):
+        if tender is None or tender in self._tenders_seen:
+            return []
+        return [('merge', self.db.collection('tenders').document(tender), {'id': tender})]
+
+    # Apply ('set' | 'merge' | 'delete', doc_ref, data) operations as batched
+    # writes, committing at most FIRESTORE_BATCH_LIMIT operations per batch
+    def commit_in_batches(self, operations):
+        commits = 0
+        for start in range(0, len(operations), FIRESTORE_BATCH_LIMIT):
+            batch = self.db.batch()
+            for op, doc_ref, data in operations[start:start + FIRESTORE_BATCH_LIMIT]:
+                if op == 'set':
+                    batch.set(doc_ref, data)
+                elif op == 'merge':
+                    batch.set(doc_ref, data, merge=True)
+                else:
+                    batch.delete(doc_ref)
+            batch.commit()
+            commits += 1
+        return commits
+
+    # Tender rankings live in tenders/{tender}/rank; the ranking of every
+    # record keeps the top-level rank collection
+    def _rank_collection(self, tender=None):
+        if tender is None:
+            return self.db.collection(u'rank')
+        return self.db.collection('tenders').document(tender).collection(u'rank')
+
+    def write_rankings(self, rankings, previous=None, tender=None):
+        rank_ref = self._rank_collection(tender)
+        operations = [('set', rank_ref.document(f'idea_{index}'), ranking)
+                      for index, ranking in enumerate(rankings, start=1)
+                      if previous is None or index > len(previous) or previous[index - 1] != ranking]
+
+        # Remove rankings left over from a previous, longer publication
+        if previous is None:
+            current = {f'idea_{index}' for index in range(1, len(rankings) + 1)}
+            stale = [doc_ref for doc_ref in rank_ref.list_documents()
+                     if doc_ref.id.startswith('idea_') and doc_ref.id not in current]
+        else:
+            stale = [rank_ref.document(f'idea_{index}')
+                     for index in range(len(rankings) + 1, len(previous) + 1)]
+        operations.extend(('delete', doc_ref, None) for doc_ref in stale)
+        operations.extend(self._tender_operations(tender))
+
+        commits = self.commit_in_batches(operations)
+        if tender is not None:
+            self._tenders_seen.add(tender)
+        return commits
+
+    def read_rankings(self, tender=None):
+        docs = {doc.id: doc.to_dict() for doc in self._rank_collection(tender).stream()}
+        return [docs[doc_id] for doc_id in sorted(docs, key=lambda d: int(d.split('_')[1]))]
+
+    def write_tender(self, tender, data=None):
+        self.db.collection('tenders').document(tender).set({**(data or {}), 'id': tender}, merge=True)
+        self._tenders_seen.add(tender)
+
+    def read_tenders(self):
+        return [doc.to_dict() for doc in self.db.collection('tenders').order_by('id').stream()]
+
+    def read_tender(self, tender):
+        snapshot = self.db.collection('tenders').document(tender).get()
+        return snapshot.to_dict() if snapshot.exists else None
+
+    def save_extraction(self, key, result, filename=None, tender=None):
+        self.db.collection('extractions').document(key).set(
+            dict(result, filename=filename, tender=tender))
+
+    def get_extraction(self, key):
+        snapshot = self.db.collection('extractions').document(key).get()
+        return snapshot.to_dict() if snapshot.exists else None
+
+    # Requirements live in tenders/{tender}/requirements, one document each
+    def write_requirements(self, tender, requirements):
+        requirements_ref = self.db.collection('tenders').document(tender).collection('requirements')
+        current = {str(requirement['id']) for requirement in requirements}
+        operations = [('set', requirements_ref.document(str(requirement['id'])), requirement)
+                      for requirement in requirements]
+        operations.extend(('delete', doc_ref, None) for doc_ref in requirements_ref.list_documents()
+                          if doc_ref.id not in current)
+        operations.extend(self._tender_operations(tender))
+        commits = self.commit_in_batches(operations)
+        self._tenders_seen.add(tender)
+        return commits
+
+    def read_requirements(self, tender):
+        docs = (self.db.collection('tenders').document(tender).collection('requirements')
+                .order_by('id').stream())
+        return [doc.to_dict() for doc in docs]
+
+
+class _Subscription:
+    # `changes` returns a count of writes the listeners were not told about;
+    # stale() is true whenever it has moved since the last call
+    def __init__(self, listeners, listener, changes):
+        self.listeners = listeners
+        self.listener = listener
+        self.changes = changes
+        self.seen = changes()
+
+    def stale(self):
+        seen, self.seen = self.seen, self.changes()
+        return seen != self.seen
+
+    def unsubscribe(self):
+        if self.listener in self.listeners:
+            self.listeners.remove(self.listener)
+
+
+class SQLiteStorage(Storage):
+    # Local backend for benchmarks, CI and air-gapped deployments. Records are
+    # stored as JSON next to indexed tender and vendor columns; projections
+    # are applied in SQL with json_extract. Watchers are notified in-process
+    # after every finance write to their tender. Writes from other processes
+    # cannot be delivered; a change counter bumped by every finance write
+    # reveals them, and watchers then report themselves stale.
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS tenders (
+            id TEXT PRIMARY KEY,
+            data TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS finance (
+            id TEXT PRIMARY KEY,
+            tender TEXT,
+            vendor TEXT,
+            data TEXT NOT NULL
+        );
+        DROP INDEX IF EXISTS finance_tender;
+        CREATE INDEX IF NOT EXISTS finance_tender_vendor ON finance (tender, vendor);
+        CREATE INDEX IF NOT EXISTS finance_vendor ON finance (vendor);
+        CREATE INDEX IF NOT EXISTS finance_tender_budget
+            ON finance (tender, json_extract(data, '$."Budget"'), id);
+        CREATE INDEX IF NOT EXISTS finance_tender_npv
+            ON finance (tender, json_extract(data, '$."NPV"'), id);
+        CREATE INDEX IF NOT EXISTS finance_tender_irr
+            ON finance (tender, json_extract(data, '$."IRR"'), id);
+        CREATE INDEX IF NOT EXISTS finance_tender_vagueness
+            ON finance (tender, json_extract(data, '$."Vagueness"'), id);
+        CREATE TABLE IF NOT EXISTS finance_changes (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL
+        );
+        INSERT OR IGNORE INTO finance_changes (id, version) VALUES (1, 0);
+        CREATE TABLE IF NOT EXISTS finance_stats (
+            tender TEXT PRIMARY KEY,
+            data TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS rankings (
+            tender TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            data TEXT NOT NULL,
+            PRIMARY KEY (tender, position)
+        );
+        CREATE TABLE IF NOT EXISTS extractions (
+            key TEXT PRIMARY KEY,
+            tender TEXT,
+            vendor TEXT,
+            filename TEXT,
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS extractions_tender ON extractions (tender);
+        CREATE INDEX IF NOT EXISTS extractions_vendor ON extractions (vendor);
+        CREATE TABLE IF NOT EXISTS requirements (
+            tender TEXT NOT NULL,
+            id INTEGER NOT NULL,
+            category TEXT,
+            data TEXT NOT NULL,
+            PRIMARY KEY (tender, id)
+        );
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._listeners = []
+        self.connection().executescript(self.SCHEMA)
+        # Last change counter value accounted for by this process, and how
+        # many times it was found moved by someone else
+        self._changes_lock = threading.Lock()
+        self._seen_version = self._finance_version(self.connection())
+        self._missed_changes = 0
+
+    # One connection per thread; sqlite3 connections are not shareable
+    def connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    # Per-tender reads use the (tender, vendor) index for both the filter
+    # and the order
+    def read_finance_items(self, tender=None, fields=None):
+        if fields:
+            column = 'json_object({})'.format(', '.join(['?, json_extract(data, ?)'] * len(fields)))
+            params = [value for field in fields for value in (field, _json_path(field))]
+        else:
+            column, params = 'data', []
+        if tender is None:
+            rows = self.connection().execute(
+                f'SELECT id, {column} FROM finance ORDER BY rowid', params)
+        else:
+            rows = self.connection().execute(
+                f'SELECT id, {column} FROM finance WHERE tender = ? ORDER BY vendor',
+                params + [tender])
+        return [(doc_id, json.loads(data)) for doc_id, data in rows]
+
+    # Keyset pagination on (sort value, id). The sort expression is spelled
+    # exactly as in the finance_tender_* indexes so SQLite can use them.
+    def read_finance_page(self, tender=None, sort='Name', descending=False, limit=50,
+                          cursor=None):
+        _check_sort(sort)
+        column = 'vendor' if sort == 'Name' else f"json_extract(data, '{_json_path(sort)}')"
+        order = 'DESC' if descending else 'ASC'
+        conditions, params = [f'{column} IS NOT NULL'], []
+        if tender is not None:
+            conditions.append('tender = ?')
+            params.append(tender)
+        if cursor is not None:
+            # The plain bound on the sort value lets the index seek to the
+            # cursor; the row value comparison breaks ties by id
+            value, doc_id = decode_cursor(cursor, sort, descending)
+            op = '<' if descending else '>'
+            conditions.append(f'{column} {op}= ? AND ({column}, id) {op} (?, ?)')
+            params.extend([value, value, doc_id])
+        rows = self.connection().execute(
+            f"SELECT id, data FROM finance WHERE {' AND '.join(conditions)} "
+            f"ORDER BY {column} {order}, id {order} LIMIT ?", params + [limit + 1]).fetchall()
+        items = [(doc_id, json.loads(data)) for doc_id, data in rows[:limit]]
+        return items, _next_cursor(items, len(rows) > limit, sort, descending)
+
+    def watch_finance(self, callback, tender=None):
+        listener = (callback, tender)
+        self._listeners.append(listener)
+        items = self.read_finance_items(tender)
+        callback(items, [('added', doc_id, record) for doc_id, record in items])
+        return _Subscription(self._listeners, listener, self._unseen_changes)
+
+    def write_finance(self, doc_id, record, tender=None):
+        data = dict(record, tender=tender) if tender is not None else record
+        with self.connection() as conn:
+            # Take the write lock up front so the statistics read below
+            # cannot race another process's update
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute('SELECT tender, data FROM finance WHERE id = ?', (doc_id,)).fetchone()
+            exists = row is not None
+            version = self._finance_version(conn)
+            conn.execute('UPDATE finance_changes SET version = ? WHERE id = 1', (version + 1,))
+            conn.execute(
+                'INSERT OR REPLACE INTO finance (id, tender, vendor, data) VALUES (?, ?, ?, ?)',
+                (doc_id, tender, record.get('Name'), json.dumps(data)))
+            if tender is not None:
+                self._register_tender(conn, tender)
+                old = json.loads(row[1]) if exists and row[0] == tender else None
+                stats_row = conn.execute('SELECT data FROM finance_stats WHERE tender = ?',
+                                         (tender,)).fetchone()
+                stats = FinanceStats.from_dict(json.loads(stats_row[0]) if stats_row else None)
+                stats.update(old, data)
+                self._write_finance_stats(conn, tender, stats.to_dict())
+        self._account_write(version)
+
+        change = ('modified' if exists else 'added', doc_id, data)
+        items = {}
+        for callback, watched in list(self._listeners):
+            if watched is None or watched == tender:
+                if watched not in items:
+                    items[watched] = self.read_finance_items(watched)
+                callback(items[watched], [change])
+
+    def _finance_version(self, conn):
+        return conn.execute('SELECT version FROM finance_changes WHERE id = 1').fetchone()[0]
+
+    # A write of ours found the counter at `version`; anything other than
+    # what we last saw means another process wrote in between
+    def _account_write(self, version):
+        with self._changes_lock:
+            if version != self._seen_version:
+                self._missed_changes += 1
+            self._seen_version = max(self._seen_version, version + 1)
+
+    # Number of times finance data was found changed behind this process's
+    # back; checked on every cached read, so it is a single-row lookup
+    def _unseen_changes(self):
+        version = self._finance_version(self.connection())
+        with self._changes_lock:
+            if version != self._seen_version:
+                self._missed_changes += 1
+                self._seen_version = version
+            return self._missed_changes
+
+    def _write_finance_stats(self, conn, tender, stats):
+        conn.execute('INSERT OR REPLACE INTO finance_stats (tender, data) VALUES (?, ?)',
+                     (tender, json.dumps(stats)))
+
+    def read_finance_stats(self, tender=None):
+        conn = self.connection()
+        if tender is not None:
+            row = conn.execute('SELECT data FROM finance_stats WHERE tender = ?', (tender,)).fetchone()
+            return json.loads(row[0]) if row else None
+        rows = conn.execute('SELECT tender, data FROM finance_stats ORDER BY tender')
+        return {stats_tender: json.loads(data) for stats_tender, data in rows}
+
+    def write_finance_stats(self, tender, stats):
+        with self.connection() as conn:
+            self._write_finance_stats(conn, tender, stats)
+
+    def _register_tender(self, conn, tender):
+        if tender is not None:
+            conn.execute('INSERT OR IGNORE INTO tenders (id, data) VALUES (?, ?)',
+                         (tender, json.dumps({'id': tender})))
+
+    # Rankings of every record are kept under the '' tender
+    def write_rankings(self, rankings, previous=None, tender=None):
+        with self.connection() as conn:
+            conn.executemany(
+                'INSERT OR REPLACE INTO rankings (tender, position, data) VALUES (?, ?, ?)',
+                [(tender or '', index, json.dumps(ranking))
+                 for index, ranking in enumerate(rankings, start=1)
+                 if previous is None or index > len(previous) or previous[index - 1] != ranking])
+            conn.execute('DELETE FROM rankings WHERE tender = ? AND position > ?',
+                         (tender or '', len(rankings)))
+            self._register_tender(conn, tender)
+        return 1
+
+    def read_rankings(self, tender=None):
+        rows = self.connection().execute(
+            'SELECT data FROM rankings WHERE tender = ? ORDER BY position', (tender or '',))
+        return [json.loads(data) for data, in rows]
+
+    def write_tender(self, tender, data=None):
+        with self.connection() as conn:
+            row = conn.execute('SELECT data FROM tenders WHERE id = ?', (tender,)).fetchone()
+            merged = {**(json.loads(row[0]) if row else {}), **(data or {}), 'id': tender}
+            conn.execute('INSERT OR REPLACE INTO tenders (id, data) VALUES (?, ?)',
+                         (tender, json.dumps(merged)))
+
+    def read_tenders(self):
+        rows = self.connection().execute('SELECT data FROM tenders ORDER BY id')
+        return [json.loads(data) for data, in rows]
+
+    def read_tender(self, tender):
+        row = self.connection().execute(
+            'SELECT data FROM tenders WHERE id = ?', (tender,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save_extraction(self, key, result, filename=None, tender=None):
+        data = dict(result, filename=filename, tender=tender)
+        with self.connection() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO extractions (key, tender, vendor, filename, data) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (key, tender, result['info'].get('Name'), filename, json.dumps(data)))
+
+    def get_extraction(self, key):
+        row = self.connection().execute(
+            'SELECT data FROM extractions WHERE key = ?', (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def write_requirements(self, tender, requirements):
+        with self.connection() as conn:
+            conn.execute('DELETE FROM requirements WHERE tender = ?', (tender,))
+            self._register_tender(conn, tender)
+            conn.executemany(
+                'INSERT INTO requirements (tender, id, category, data) VALUES (?, ?, ?, ?)',
+                [(tender, requirement['id'], requirement['category'], json.dumps(requirement))
+                 for requirement in requirements])
+        return 1
+
+    def read_requirements(self, tender):
+        rows = self.connection().execute(
+            'SELECT data FROM requirements WHERE tender = ? ORDER BY id', (tender,))
+        return [json.loads(data) for data, in rows]
+
+
+# Documents returned by each read, from its result
+READ_COUNTS = {
+    'read_finance': len,
+    'read_finance_items': len,
+    'read_finance_page': lambda result: len(result[0]),
+    'read_rankings': len,
+    'read_tenders': len,
+    'read_tender': lambda result: 1,
+    'get_extraction': lambda result: 1,
+    'read_requirements': len,
+    'read_finance_stats': lambda result: 1 if 'records' in result else len(result)
+}
+# Documents stored by each write, from its arguments
+WRITE_COUNTS = {
+    'write_finance': lambda arguments: 1 if arguments.get('tender') is None else 2,
+    'write_rankings': lambda arguments: _rankings_written(arguments['rankings'],
+                                                         arguments.get('previous')),
+    'write_tender': lambda arguments: 1,
+    'write_finance_stats': lambda arguments: 1,
+    'save_extraction': lambda arguments: 1,
+    'write_requirements': lambda arguments: len(arguments['requirements'])
+}
+
+
+class InstrumentedStorage:
+    # Wraps a backend: every public call is timed as a `storage.<method>`
+    # span, and the documents read and written are counted per method.
+    # Watch deliveries are counted by FinanceCache.
+    def __init__(self, storage):
+        self.storage = storage
+        self.backend = type(storage).__name__
+
+    def __getattr__(self, name):
+        method = getattr(self.storage, name)
+        if name.startswith('_') or not callable(method):
+            return method
+
+        def call(*args, **kwargs):
+            with span(f'storage.{name}'):
+                result = method(*args, **kwargs)
+            if name in READ_COUNTS and result is not None:
+                STORAGE_READS.inc(READ_COUNTS[name](result), backend=self.backend, method=name)
+            elif name in WRITE_COUNTS:
+                arguments = inspect.signature(method).bind(*args, **kwargs).arguments
+                STORAGE_WRITES.inc(WRITE_COUNTS[name](arguments), backend=self.backend,
+                                   method=name)
+            return result
+        return call
+
+
+# Positions write_rankings stores or deletes
+def _rankings_written(rankings, previous):
+    if previous is None:
+        return len(rankings)
+    changed = sum(1 for index, ranking in enumerate(rankings)
+                  if index >= len(previous) or previous[index] != ranking)
+    return changed + max(0, len(previous) - len(rankings))
+
+
+# JSON path of a top-level field, quoted so names like "Phone No" work
+def _json_path(field):
+    return '$.' + json.dumps(field)
+
+
+def _check_sort(sort):
+    if sort not in FINANCE_SORT_FIELDS:
+        raise ValueError(f"Cannot sort finance records by {sort!r}")
+
+
+def _next_cursor(items, more, sort, descending):
+    if not more:
+        return None
+    doc_id, record = items[-1]
+    payload = json.dumps([sort, descending, record[sort], doc_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(payload).decode('ascii').rstrip('=')
+
+
+# (sort value, doc id) of a cursor issued by _next_cursor for the same sort
+def decode_cursor(cursor, sort, descending):
+    try:
+        payload = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        cursor_sort, cursor_descending, value, doc_id = json.loads(payload)
+    except (ValueError, TypeError):
+        raise InvalidCursor("Malformed cursor")
+    if (cursor_sort, cursor_descending) != (sort, descending):
+        raise InvalidCursor("Cursor was issued for a different sort order")
+    return value, doc_id
+
+
+# Pick the backend named by config['STORAGE_BACKEND'] ('firestore' or 'sqlite')
+def create_storage(config):
+    backend = config.get('STORAGE_BACKEND', 'firestore')
+    if backend == 'firestore':
+        return FirestoreStorage(config['FIREBASE_CREDENTIALS'])
+    if backend == 'sqlite':
+        return SQLiteStorage(config['SQLITE_PATH'])
+    raise ValueError(f"Unknown storage backend: {backend}")
@@ -0,0 +1,189 @@
+import re
+
+import numpy as np
+from scipy import sparse
+
+# Seed vocabulary of each requirement category; clauses are assigned to the
+# category whose keywords they weigh most on
+CATEGORY_KEYWORDS = {
+    'legal': [
+        'agreement', 'arbitration', 'breach', 'claim', 'clause', 'confidential', 'confidentiality',
+        'contract', 'court', 'damage', 'dispute', 'force', 'governing', 'indemnify', 'indemnity',
+        'intellectual', 'jurisdiction', 'law', 'legal', 'liability', 'liable', 'litigation',
+        'majeure', 'obligation', 'party', 'property', 'termination', 'terminate', 'warranty'
+    ],
+    'finance': [
+        'advance', 'bank', 'bid', 'budget', 'cost', 'currency', 'deposit', 'earnest', 'emd',
+        'fee', 'financial', 'fund', 'gst', 'guarantee', 'interest', 'invoice', 'irr', 'npv',
+        'payment', 'penalty', 'price', 'pricing', 'rate', 'retention', 'tax', 'turnover', 'value'
+    ],
+    'compliance': [
+        'accreditation', 'approval', 'audit', 'authority', 'certificate', 'certification',
+        'certified', 'clearance', 'compliance', 'compliant', 'environmental', 'insurance', 'iso',
+        'labour', 'license', 'licence', 'norm', 'permit', 'policy', 'registration', 'regulation',
+        'regulatory', 'safety', 'standard', 'statutory'
+    ],
+    'technical': [
+        'capacity', 'concrete', 'design', 'drawing', 'equipment', 'engineering', 'grade',
+        'installation', 'load', 'machinery', 'maintenance', 'material', 'method', 'performance',
+        'quality', 'software', 'specification', 'steel', 'structural', 'system', 'technical',
+        'technology', 'test', 'testing', 'tolerance'
+    ]
+}
+CATEGORIES = list(CATEGORY_KEYWORDS)
+# Clauses sharing no keyword with any category
+UNCATEGORIZED = 'general'
+
+STOPWORDS = set("""
+    a about above after again all also an and any are as at be been before being below between
+    both but by can could did do does doing during each either etc for from further had has have
+    having he her here hers him his how if in into is it its itself may more most must no nor
+    not of off on once only or other our out over own per same shall she should so some such
+    than that the their them then there these they this those through to too under until up
+    upon very was we were what when where which while who whom why will with within without
+    would you your
+""".split())
+
+TERM_PATTERN = re.compile(r'[a-z][a-z0-9]+')
+SENTENCE_END = re.compile(r'(?<=[.;!?])\s+')
+# Lines starting a numbered or bulleted item open a new clause
+ITEM_START = re.compile(r'\n(?=\s*(?:\d+(?:\.\d+)*[.)]?|\(?[a-z]\)|[ivx]+\)|[•*-])\s)')
+
+MIN_CLAUSE_WORDS = 5
+# Terms of a requirement looked for in vendor submissions
+KEY_TERMS = 8
+# Share of a requirement's key terms a submission must contain to comply
+COMPLIANCE_THRESHOLD = 0.6
+# Rows scored per sparse product when classifying
+BATCH_SIZE = 4096
+
+
+# Plural folding, so 'damages' and 'damage' count as one term
+def _stem(word):
+    if word.endswith('ies') and len(word) > 4:
+        return word[:-3] + 'y'
+    if word.endswith('s') and len(word) > 3 and not word.endswith(('ss', 'us', 'is')):
+        return word[:-1]
+    return word
+
+
+def terms(text):
+    return [_stem(word) for word in TERM_PATTERN.findall(text.lower()) if word not in STOPWORDS]
+
+
+# Distinct terms of a long text, stemming each distinct word once
+def term_set(text):
+    return {_stem(word) for word in set(TERM_PATTERN.findall(text.lower())) - STOPWORDS}
+
+
+# Split tender page texts into requirement clauses: numbered or bulleted
+# items and sentences, with line breaks inside them joined up
+def split_clauses(pages):
+    clauses = []
+    for text in pages:
+        for item in ITEM_START.split(text):
+            for sentence in SENTENCE_END.split(' '.join(item.split())):
+                if len(sentence.split()) >= MIN_CLAUSE_WORDS:
+                    clauses.append(sentence)
+    return clauses
+
+
+class Vocabulary:
+    def __init__(self, terms=()):
+        self.index = {}
+        for term in terms:
+            self.index.setdefault(term, len(self.index))
+
+    def __len__(self):
+        return len(self.index)
+
+    # CSR matrix of term counts (or presence) with one row per term list;
+    # terms outside the vocabulary are added unless frozen
+    def matrix(self, rows, binary=False, frozen=False):
+        indptr, indices = [0], []
+        for row in rows:
+            if frozen:
+                columns = [self.index[term] for term in row if term in self.index]
+            else:
+                columns = [self.index.setdefault(term, len(self.index)) for term in row]
+            if binary:
+                columns = set(columns)
+            indices.extend(columns)
+            indptr.append(len(indices))
+        data = np.ones(len(indices), dtype=np.float64)
+        matrix = sparse.csr_matrix((data, indices, indptr), shape=(len(indptr) - 1, len(self)))
+        matrix.sum_duplicates()
+        return matrix
+
+
+def _normalize_rows(matrix):
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    return (sparse.diags(1.0 / norms) @ matrix).tocsr()
+
+
+def tfidf(counts):
+    df = np.bincount(counts.indices, minlength=counts.shape[1])
+    idf = np.log((1 + counts.shape[0]) / (1 + df)) + 1
+    return _normalize_rows(counts @ sparse.diags(idf))
+
+
+# Classify clauses by cosine similarity of their TF-IDF vectors to each
+# category's keyword vector. Returns (categories, confidences, key terms).
+def classify(clauses):
+    vocabulary = Vocabulary(_stem(word) for words in CATEGORY_KEYWORDS.values() for word in words)
+    clause_terms = [terms(clause) for clause in clauses]
+    weights = tfidf(vocabulary.matrix(clause_terms))
+    keywords = _normalize_rows(vocabulary.matrix(
+        [[_stem(word) for word in CATEGORY_KEYWORDS[category]] for category in CATEGORIES],
+        binary=True, frozen=True))
+
+    categories, confidences = [], []
+    for start in range(0, weights.shape[0], BATCH_SIZE):
+        scores = (weights[start:start + BATCH_SIZE] @ keywords.T).toarray()
+        best = scores.argmax(axis=1)
+        best_scores = scores[np.arange(len(best)), best]
+        categories.extend(CATEGORIES[i] if score > 0 else UNCATEGORIZED
+                          for i, score in zip(best, best_scores))
+        confidences.extend(np.round(best_scores, 4).tolist())
+
+    return categories, confidences, _key_terms(weights, vocabulary)
+
+
+# The highest weighted terms of each clause
+def _key_terms(weights, vocabulary):
+    names = np.empty(len(vocabulary), dtype=object)
+    for term, index in vocabulary.index.items():
+        names[index] = term
+    key_terms = []
+    for row in range(weights.shape[0]):
+        start, end = weights.indptr[row], weights.indptr[row + 1]
+        order = np.argsort(-weights.data[start:end], kind='stable')[:KEY_TERMS]
+        key_terms.append(names[weights.indices[start:end][order]].tolist())
+    return key_terms
+
+
+# Requirement records for a tender document's page texts
+def tabulate(pages):
+    clauses = split_clauses(pages)
+    categories, confidences, key_terms = classify(clauses)
+    return [{"id": index, "category": category, "confidence": confidence, "text": clause,
+             "terms": clause_terms}
+            for index, (clause, category, confidence, clause_terms)
+            in enumerate(zip(clauses, categories, confidences, key_terms), start=1)]
+
+
+# Vendor x requirement coverage: the share of each requirement's key terms
+# found in each vendor's submission, as one sparse product. vendor_terms maps
+# each vendor to the term_set() of its submission.
+def compliance_matrix(requirements, vendor_terms):
+    vendors = list(vendor_terms)
+    vocabulary = Vocabulary(term for requirement in requirements for term in requirement["terms"])
+    required = vocabulary.matrix([requirement["terms"] for requirement in requirements],
+                                 binary=True, frozen=True)
+    present = vocabulary.matrix([vendor_terms[vendor] for vendor in vendors],
+                                binary=True, frozen=True)
+    totals = np.asarray(required.sum(axis=1)).ravel()
+    totals[totals == 0] = 1.0
+    coverage = (present @ required.T).toarray() / totals
+    return vendors, coverage
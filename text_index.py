@@ -0,0 +1,161 @@
+import hashlib
+import sqlite3
+import threading
+
+# Tokens of context kept around each highlighted match
+SNIPPET_TOKENS = 12
+
+
+class InvalidQuery(ValueError):
+    pass
+
+
+class TextIndex:
+    # Full-text index of every extracted page, kept in SQLite FTS5 (positional
+    # postings, BM25 ranking). Each tender gets its own FTS5 table, so a
+    # tender's search only touches its own postings; documents are keyed by
+    # the upload's content hash and indexed once per tender.
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS partitions (
+            tender TEXT PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE
+        );
+        CREATE TABLE IF NOT EXISTS documents (
+            key TEXT NOT NULL,
+            tender TEXT NOT NULL,
+            vendor TEXT,
+            filename TEXT,
+            pages INTEGER NOT NULL,
+            PRIMARY KEY (key, tender)
+        );
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._partitions = {}
+        self.connection().executescript(self.SCHEMA)
+
+    # One connection per thread; sqlite3 connections are not shareable
+    def connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    # Documents without a tender share the '' partition
+    def _partition(self, conn, tender, create=False):
+        tender = tender or ''
+        name = self._partitions.get(tender)
+        if name is None:
+            row = conn.execute('SELECT name FROM partitions WHERE tender = ?', (tender,)).fetchone()
+            if row is not None:
+                name = row[0]
+            elif create:
+                name = 'pages_' + hashlib.sha1(tender.encode('utf-8')).hexdigest()[:16]
+                conn.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {name} USING fts5("
+                             "text, key UNINDEXED, vendor UNINDEXED, filename UNINDEXED, "
+                             "page UNINDEXED, tokenize = 'porter unicode61')")
+                conn.execute('INSERT INTO partitions (tender, name) VALUES (?, ?)', (tender, name))
+            else:
+                return None
+            self._partitions[tender] = name
+        return name
+
+    def contains(self, key, tender=None):
+        row = self.connection().execute('SELECT 1 FROM documents WHERE key = ? AND tender = ?',
+                                        (key, tender or '')).fetchone()
+        return row is not None
+
+    # Index the page texts of one upload; returns False if it was already
+    # indexed. `pages` may be any iterable (e.g. a generator over spooled
+    # text) and is consumed once, a page at a time.
+    def add(self, key, pages, tender=None, vendor=None, filename=None):
+        with self.connection() as conn:
+            if self.contains(key, tender):
+                return False
+            name = self._partition(conn, tender, create=True)
+            count = 0
+
+            def rows():
+                nonlocal count
+                for count, text in enumerate(pages, start=1):
+                    if text:
+                        yield text, key, vendor, filename, count
+
+            conn.executemany(
+                f'INSERT INTO {name} (text, key, vendor, filename, page) VALUES (?, ?, ?, ?, ?)',
+                rows())
+            conn.execute('INSERT INTO documents (key, tender, vendor, filename, pages) VALUES (?, ?, ?, ?, ?)',
+                         (key, tender or '', vendor, filename, count))
+        return True
+
+    # Index an upload under another tender from the text already stored for it,
+    # so a repeat upload is searchable there without parsing the PDF again
+    def copy(self, key, tender=None, vendor=None, filename=None):
+        conn = self.connection()
+        if self.contains(key, tender):
+            return False
+        row = conn.execute('SELECT tender, pages FROM documents WHERE key = ? LIMIT 1', (key,)).fetchone()
+        if row is None:
+            return False
+        source = self._partition(conn, row[0])
+        pages = [''] * row[1]
+        for page, text in conn.execute(f'SELECT page, text FROM {source} WHERE key = ?', (key,)):
+            pages[page - 1] = text
+        return self.add(key, pages, tender=tender, vendor=vendor, filename=filename)
+
+    # Best matches first; query uses FTS5 syntax, e.g. "liquidated damages" OR retention
+    def search(self, query, tender=None, limit=20):
+        conn = self.connection()
+        if tender is not None:
+            names = [(tender, self._partition(conn, tender))]
+        else:
+            names = conn.execute('SELECT tender, name FROM partitions').fetchall()
+
+        results = []
+        for partition, name in names:
+            if name is None:
+                continue
+            try:
+                rows = conn.execute(
+                    f"SELECT vendor, filename, page, "
+                    f"snippet({name}, 0, '<mark>', '</mark>', '…', {SNIPPET_TOKENS}), rank "
+                    f"FROM {name} WHERE {name} MATCH ? ORDER BY rank LIMIT ?",
+                    (query, limit)).fetchall()
+            except sqlite3.OperationalError as e:
+                raise InvalidQuery(str(e))
+            results.extend(
+                {"tender": partition or None, "vendor": vendor, "filename": filename, "page": page,
+                 "snippet": snippet, "score": -rank}
+                for vendor, filename, page, snippet, rank in rows)
+
+        results.sort(key=lambda result: result["score"], reverse=True)
+        return results[:limit]
+
+    # Number of documents indexed for a tender; changes whenever it gains one
+    def count(self, tender=None):
+        row = self.connection().execute('SELECT COUNT(*) FROM documents WHERE tender = ?',
+                                        (tender or '',)).fetchone()
+        return row[0]
+
+    # Full indexed text of each submission in a tender, keyed by vendor (or
+    # filename when no vendor name was extracted)
+    def vendor_texts(self, tender=None):
+        conn = self.connection()
+        name = self._partition(conn, tender)
+        if name is None:
+            return {}
+        texts = {}
+        rows = conn.execute(f'SELECT vendor, filename, text FROM {name} ORDER BY key, CAST(page AS INTEGER)')
+        for vendor, filename, text in rows:
+            texts.setdefault(vendor or filename, []).append(text)
+        return {vendor: '\n'.join(pages) for vendor, pages in texts.items()}
+
+    def stats(self):
+        conn = self.connection()
+        documents, pages = conn.execute('SELECT COUNT(*), COALESCE(SUM(pages), 0) FROM documents').fetchone()
+        partitions, = conn.execute('SELECT COUNT(*) FROM partitions').fetchone()
+        return {"documents": documents, "pages": pages, "partitions": partitions}
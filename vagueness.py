@@ -0,0 +1,150 @@
+import re
+
+# Hedges and open-ended wording that leave contractual requirements undefined
+VAGUE_PHRASES = [
+    # deferred decisions
+    "to be decided", "to be determined", "to be confirmed", "to be agreed", "to be finalized",
+    "to be advised", "to be notified later", "at a later stage", "in due course", "as and when",
+    "tbd", "tba", "tbc",
+    # discretion
+    "as applicable", "if applicable", "where applicable", "wherever applicable",
+    "as appropriate", "where appropriate", "if appropriate", "as necessary", "if necessary",
+    "where necessary", "as required", "if required", "where required", "as needed", "if needed",
+    "as deemed fit", "as deemed necessary", "as deemed appropriate", "at the discretion of",
+    "at its sole discretion", "at our discretion", "as directed", "as instructed",
+    "as specified later", "as per requirement", "as per requirements", "as per the requirement",
+    "as the case may be", "if any", "where possible", "wherever possible", "if possible",
+    "as far as possible", "as far as practicable", "to the extent possible",
+    "to the extent practicable",
+    # conditions
+    "subject to", "subject to change", "subject to approval", "subject to availability",
+    "unless otherwise", "unless otherwise agreed", "unless otherwise specified",
+    "except as otherwise", "may be", "may or may not", "should ideally",
+    # imprecise quantities
+    "approximately", "approx", "roughly", "nearly", "circa", "up to",
+    "at least", "or so", "more or less", "some", "several", "various", "numerous", "many",
+    "a few", "a number of", "a reasonable number", "a significant number", "sufficient",
+    "adequate", "adequately", "substantial", "substantially", "minimal", "minimum possible",
+    "maximum possible", "as much as possible", "as soon as possible", "asap",
+    # imprecise quality and time
+    "reasonable", "reasonably", "reasonable time", "reasonable efforts", "best efforts",
+    "best endeavours", "best endeavors", "commercially reasonable", "timely", "promptly",
+    "in a timely manner", "without undue delay", "periodically", "from time to time",
+    "regularly", "frequently", "occasionally", "shortly", "soon", "normally", "usually",
+    "generally", "typically", "ordinarily", "high quality", "good quality", "satisfactory",
+    "to the satisfaction of", "acceptable", "industry standard", "best practice",
+    "best practices", "state of the art", "user friendly", "robust", "flexible", "efficient",
+    "appropriate", "suitable", "etc", "and so on", "and the like", "and/or",
+    "including but not limited to", "not limited to", "or equivalent", "or similar"
+]
+
+WORD_PATTERN = re.compile(r"\w+(?:/\w+)*")
+CLAUSE_BOUNDARIES = '.;:!?\n'
+
+# Clause text attached to each span is cut to this many characters
+MAX_CLAUSE_CHARS = 240
+# Spans kept per document; the score still counts every match
+MAX_SPANS = 500
+
+
+class PhraseAutomaton:
+    # Aho-Corasick automaton over words rather than characters: pages are
+    # split into words by one regex pass, then every phrase ending at each
+    # word is found in a single walk, so phrase count does not affect speed
+    # and matches always fall on word boundaries.
+    def __init__(self, phrases):
+        self.phrases = []
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        for phrase in phrases:
+            words = tuple(WORD_PATTERN.findall(phrase.lower()))
+            if words:
+                self._add(words, len(self.phrases))
+                self.phrases.append((phrase, len(words)))
+        self._build_failure_links()
+
+    def _add(self, words, phrase_id):
+        state = 0
+        for word in words:
+            next_state = self._goto[state].get(word)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][word] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = next_state
+        self._out[state].append(phrase_id)
+
+    def _build_failure_links(self):
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for word, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and word not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(word, 0)
+                self._out[next_state] = self._out[next_state] + self._out[self._fail[next_state]]
+
+    # Yields (start, end, phrase) character spans for every phrase in text
+    def finditer(self, text):
+        goto, fail, out = self._goto, self._fail, self._out
+        starts = []
+        state = 0
+        for match in WORD_PATTERN.finditer(text.lower()):
+            word = match.group()
+            starts.append(match.start())
+            while state and word not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(word, 0)
+            for phrase_id in out[state]:
+                phrase, length = self.phrases[phrase_id]
+                yield starts[-length], match.end(), phrase
+
+
+class VaguenessScan:
+    # Accumulates matches for one document as its pages stream past
+    def __init__(self, automaton):
+        self.automaton = automaton
+        self.words = 0
+        self.matches = 0
+        self.spans = []
+
+    def feed(self, page, text):
+        self.words += len(WORD_PATTERN.findall(text))
+        for start, end, phrase in _outermost(self.automaton.finditer(text)):
+            self.matches += 1
+            if len(self.spans) < MAX_SPANS:
+                self.spans.append({"page": page, "start": start, "end": end, "phrase": phrase,
+                                   "clause": _clause(text, start, end)})
+
+    # Vague phrases per 1,000 words
+    @property
+    def score(self):
+        return round(1000 * self.matches / self.words, 2) if self.words else 0.0
+
+    def result(self):
+        return {"score": self.score, "matches": self.matches, "words": self.words,
+                "spans": self.spans}
+
+
+# Drop matches contained in a longer one ("reasonable" in "reasonable time")
+def _outermost(matches):
+    last_end = -1
+    for start, end, phrase in sorted(matches, key=lambda match: (match[0], -match[1])):
+        if end > last_end:
+            last_end = end
+            yield start, end, phrase
+
+
+# The sentence or list item around a match
+def _clause(text, start, end):
+    clause_start = max(text.rfind(mark, 0, start) for mark in CLAUSE_BOUNDARIES) + 1
+    ends = [i for i in (text.find(mark, end) for mark in CLAUSE_BOUNDARIES) if i != -1]
+    clause = text[clause_start:min(ends, default=len(text))].strip()
+    return clause[:MAX_CLAUSE_CHARS]
+
+
+vague_phrases = PhraseAutomaton(VAGUE_PHRASES)